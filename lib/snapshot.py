@@ -36,6 +36,10 @@ class SnapshotCreator:
     the user's staged changes or index.
     """
 
+    # Paths passed to one git add/rm/diff, keeping the command line well
+    # under Windows' 32K character limit
+    PATHS_PER_CALL = 200
+
     def __init__(self, cwd: Optional[Path] = None, data_dir: Optional[Path] = None):
         """
         Initialize snapshot creator.
@@ -52,15 +56,31 @@ class SnapshotCreator:
         self._temp_index: Optional[Path] = None
 
     def _run_git(self, *args, env: Optional[Dict[str, str]] = None) -> subprocess.CompletedProcess:
-        """Run git command in working directory."""
+        """Run git command in working directory (env=None inherits ours)."""
         return subprocess.run(
             ["git"] + list(args),
             cwd=self.cwd,
             capture_output=True,
             text=True,
-            env=env or os.environ.copy()
+            env=env
         )
 
+    def _run_git_paths(self, *args, paths: List[str], env: Optional[Dict[str, str]] = None) -> subprocess.CompletedProcess:
+        """
+        Run a git command over many paths, PATHS_PER_CALL at a time.
+
+        Paths go on the command line after "--" (--pathspec-from-file
+        would need git 2.25+). Stops at the first failing batch.
+
+        Returns:
+            The failing batch's result, or the last one
+        """
+        for i in range(0, len(paths), self.PATHS_PER_CALL):
+            result = self._run_git(*args, "--", *paths[i:i + self.PATHS_PER_CALL], env=env)
+            if result.returncode != 0:
+                break
+        return result
+
     def _create_temp_index(self) -> Path:
         """
         Create a temporary index file.
@@ -105,29 +125,20 @@ class SnapshotCreator:
             # HEAD might not exist (empty repo), that's ok
             pass
 
-        # Stage each changed file
-        for change in changes:
-            if change.status in ('M', 'A'):
-                # Modified or Added: add to index
-                result = self._run_git("add", change.path, env=env)
-                if result.returncode != 0:
-                    return False
-            elif change.status == 'D':
-                # Deleted: remove from index
-                result = self._run_git("rm", change.path, env=env)
-                if result.returncode != 0:
-                    # File might not be in index, that's ok
-                    pass
-            elif change.status == '??':
-                # Untracked: add to index
-                result = self._run_git("add", change.path, env=env)
-                if result.returncode != 0:
-                    return False
-            elif change.status == 'R':
-                # Renamed: add new path
-                result = self._run_git("add", change.path, env=env)
-                if result.returncode != 0:
-                    return False
+        # Stage changed files with batched git add and git rm calls.
+        # Modified, added, untracked and renamed (new path) files are added
+        to_add = [c.path for c in changes if c.status in ('M', 'A', '??', 'R')]
+        # Deleted files are removed from the index only; a file that is not
+        # in the index is fine
+        to_remove = [c.path for c in changes if c.status == 'D']
+
+        if to_add:
+            result = self._run_git_paths("add", paths=to_add, env=env)
+            if result.returncode != 0:
+                return False
+
+        if to_remove:
+            self._run_git_paths("rm", "-q", "--cached", "--ignore-unmatch", paths=to_remove, env=env)
 
         return True
 
@@ -143,25 +154,35 @@ class SnapshotCreator:
         """
         files_info = []
 
+        # Line stats for modified and added files, from batched git diffs.
+        # -z keeps paths unquoted: each record is "<add>\t<del>\t<path>\0"
+        # (paths go on the command line, a batch at a time)
+        numstat = {}
+        stat_paths = [c.path for c in changes if c.status in ('M', 'A')]
+        for i in range(0, len(stat_paths), self.PATHS_PER_CALL):
+            batch = stat_paths[i:i + self.PATHS_PER_CALL]
+            result = self._run_git("diff", "--numstat", "-z", "--no-renames", "--", *batch)
+            if result.returncode != 0:
+                continue
+            for record in result.stdout.split('\0'):
+                parts = record.split('\t', 2)
+                if len(parts) == 3:
+                    numstat[parts[2]] = parts
+
         for change in changes:
             info = {
                 "path": change.path,
                 "status": change.status
             }
 
-            # For modified and added files, try to get line stats
-            if change.status in ('M', 'A'):
-                # Use git diff --numstat on the specific file
-                result = self._run_git("diff", "--numstat", "--", change.path)
-                if result.returncode == 0 and result.stdout.strip():
-                    parts = result.stdout.split('\t')
-                    if len(parts) >= 2:
-                        try:
-                            info["additions"] = int(parts[0]) if parts[0] != '-' else 0
-                            info["deletions"] = int(parts[1]) if parts[1] != '-' else 0
-                        except ValueError:
-                            # Binary files
-                            pass
+            parts = numstat.get(change.path)
+            if parts:
+                try:
+                    info["additions"] = int(parts[0]) if parts[0] != '-' else 0
+                    info["deletions"] = int(parts[1]) if parts[1] != '-' else 0
+                except ValueError:
+                    # Binary files
+                    pass
 
             files_info.append(info)
 
@@ -58,29 +58,26 @@ class StateManager:
 
             If file doesn't exist or is invalid, returns empty state.
         """
-        if not self.state_file.exists():
-            return {
-                "last_step_sha": None,
-                "last_step_id": None,
-                "updated_at": None
-            }
-
+        # Always reread: other processes replace the file, and a stat key
+        # (inode, size, mtime) can't tell two writes within one clock tick
+        # apart once the inode is reused
         try:
-            with open(self.state_file, "r") as f:
-                state = json.load(f)
-                return {
-                    "last_step_sha": state.get("last_step_sha"),
-                    "last_step_id": state.get("last_step_id"),
-                    "updated_at": state.get("updated_at")
-                }
-        except (json.JSONDecodeError, IOError):
-            # Invalid file, return empty state
+            with open(self.state_file, "rb") as f:
+                state = json.loads(f.read())
+        except (ValueError, IOError):
+            # Missing or invalid file, return empty state
             return {
                 "last_step_sha": None,
                 "last_step_id": None,
                 "updated_at": None
             }
 
+        return {
+            "last_step_sha": state.get("last_step_sha"),
+            "last_step_id": state.get("last_step_id"),
+            "updated_at": state.get("updated_at")
+        }
+
     def save_state(self, state: Dict[str, Any]) -> bool:
         """
         Save state to file atomically with locking.
@@ -98,11 +95,16 @@ class StateManager:
         temp_file = self.state_file.with_suffix(".tmp")
 
         try:
-            with open(temp_file, "w") as f:
-                json.dump(state, f, indent=2)
+            # Encode up front: one write instead of a chunk per JSON token
+            payload = json.dumps(state, indent=2).encode("utf-8")
+            # 0o666 so the umask decides the final mode, like open(..., "w")
+            fd = os.open(temp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+            # A buffered file object retries short writes until all is written
+            with os.fdopen(fd, "wb") as f:
+                f.write(payload)
 
             # Atomic rename
-            temp_file.replace(self.state_file)
+            os.replace(temp_file, self.state_file)
             return True
 
         except (IOError, OSError) as e:
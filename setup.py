@@ -31,6 +31,10 @@ setup(
     install_requires=[
         # No external dependencies - uses only stdlib
     ],
+    extras_require={
+        # Test runner; xdist spreads test functions over CPU cores (pytest -n auto)
+        "dev": ["pytest", "pytest-xdist"],
+    },
     classifiers=[
         "Development Status :: 3 - Alpha",
         "Intended Audience :: Developers",
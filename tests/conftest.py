@@ -0,0 +1,38 @@
+"""Shared pytest fixtures for the Rewindo test suite."""
+
+import pytest
+
+from helpers import compile_lib, copy_repo, template_repo
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "slow: checks repository setup or runs git commands")
+    config.addinivalue_line("markers", "fast: pure Python, no git repository or subprocess; select with -m fast for a quick inner loop")
+
+    # Under pytest-xdist only the controller compiles, before any worker starts
+    if not hasattr(config, "workerinput"):
+        compile_lib()
+
+
+@pytest.fixture(scope="session")
+def repo_template():
+    """
+    A git repo with one (empty) commit, built once per session.
+
+    Under pytest-xdist each worker is its own process and builds its own
+    copy, so no locking is needed.
+    """
+    return template_repo()[0]
+
+
+@pytest.fixture
+def repo(tmp_path, repo_template):
+    """
+    tmp_path holding a copy of the template git repo.
+
+    Objects are hardlinked and everything else copied (see copy_repo), so
+    commits in one copy never show up in the template or other copies.
+    """
+    copy_repo(repo_template, tmp_path)
+    return tmp_path
+
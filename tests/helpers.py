@@ -0,0 +1,444 @@
+"""Shared helpers for the Rewindo test suite."""
+
+import atexit
+import compileall
+import functools
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+REWINDO_BIN = str(PROJECT_ROOT / "bin" / "rewindo")
+
+# Make lib/ importable for any test module that imports these helpers
+# first, once per process rather than by each module
+LIB_DIR = PROJECT_ROOT / "lib"
+if str(LIB_DIR) not in sys.path:
+    sys.path.insert(0, str(LIB_DIR))
+
+# Absolute path, so subprocess can start git with posix_spawn (see SPAWN_KWARGS)
+GIT = shutil.which("git") or "git"
+
+# subprocess only uses posix_spawn instead of fork+exec when the program
+# path is absolute, cwd is None and close_fds is False. Our pipes are
+# non-inheritable anyway, so children still get only their stdio.
+SPAWN_KWARGS = {"close_fds": False}
+
+# Test repos are throwaway: skip fsync on every object/ref write git makes,
+# never start auto-gc, and ignore any hooks, signing or advice from the
+# user's config
+_TEST_GIT_CONFIG = [
+    "core.fsync=none",
+    "gc.auto=0",
+    "core.hooksPath=/dev/null",
+    "commit.gpgSign=false",
+    "advice.defaultBranchName=false",
+]
+GIT_ENV = {
+    **os.environ,
+    "GIT_CONFIG_PARAMETERS": " ".join(
+        filter(None, [os.environ.get("GIT_CONFIG_PARAMETERS")] + [f"'{c}'" for c in _TEST_GIT_CONFIG])
+    ),
+    # Silences all advice on git 2.46+; older versions ignore it
+    "GIT_ADVICE": "0",
+}
+
+# Environment for rewindo CLI processes, built once rather than per call
+CLI_ENV = {**GIT_ENV, "PYTHONPATH": str(LIB_DIR)}
+
+
+def compile_lib():
+    """
+    Compile lib/ (a no-op when the .pyc files are current).
+
+    Called once by whichever process starts the CLI processes in parallel
+    (conftest's pytest_configure on the xdist controller, and run_tests),
+    so they load cached bytecode instead of each compiling and writing it.
+    PYTHONDONTWRITEBYTECODE is deliberately not set: it would make every
+    cold start recompile the modules.
+    """
+    compileall.compile_dir(str(LIB_DIR), quiet=1)
+
+
+def fast_tmp() -> Optional[str]:
+    """
+    Return a RAM-backed directory for temp repos, or None for the default.
+
+    Pass as dir= to tempfile helpers so test repos live on tmpfs
+    (/dev/shm on Linux) instead of a disk.
+    """
+    shm = "/dev/shm"
+    if os.path.isdir(shm) and os.access(shm, os.W_OK):
+        return shm
+    return None
+
+
+_test_root = None
+
+
+def _remove_test_root(path: str, owner_pid: int):
+    """atexit hook: remove the temp root, unless running in a forked child."""
+    if os.getpid() == owner_pid:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def fresh_dir(prefix: str = "test-") -> Path:
+    """
+    Return a new, empty directory under the suite's temp root.
+
+    The root (on tmpfs where available) is created on first use and
+    removed in one rmtree when the main process exits, including repos
+    made in worker processes. Set REWINDO_TESTS_NO_CLEANUP=1 to keep it
+    for inspection.
+    """
+    global _test_root
+    if _test_root is None:
+        _test_root = tempfile.mkdtemp(prefix="rewindo-tests-", dir=fast_tmp())
+        if os.environ.get("REWINDO_TESTS_NO_CLEANUP") == "1":
+            print(f"Keeping test repos in {_test_root}", file=sys.stderr)
+        else:
+            atexit.register(_remove_test_root, _test_root, os.getpid())
+    return Path(tempfile.mkdtemp(prefix=prefix, dir=_test_root))
+
+
+_git_template = None
+
+
+def git_template() -> str:
+    """
+    Return a git template directory whose config sets the test identity.
+
+    `git init --template=<dir>` (and `git clone --template=<dir>`) copy it
+    into the new repo, replacing the usual init + two `git config` calls.
+    Created on first use and removed at exit.
+    """
+    global _git_template
+    if _git_template is None:
+        _git_template = tempfile.mkdtemp(prefix="rewindo-git-template-")
+        atexit.register(shutil.rmtree, _git_template, ignore_errors=True)
+        with open(os.path.join(_git_template, "config"), "w") as f:
+            f.write("[user]\n\temail = test@test.com\n\tname = Test\n")
+    return _git_template
+
+
+def link_or_copy(src, dst):
+    """Hardlink src to dst, falling back to a copy (e.g. across filesystems)."""
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def copy_repo(src, dst):
+    """
+    Copy a git repo (working tree included) to dst, which may already exist.
+
+    Only the object store is hardlinked: git never modifies an object file
+    once written, while other files such as logs/HEAD, logs/refs/* and
+    COMMIT_EDITMSG are appended to or rewritten in place, so they are
+    copied to keep changes in one copy out of the others. So are tmp_*
+    files in the object store, such as the pack a running GitBatch is
+    still writing.
+    """
+    objects = os.path.join(str(src), ".git", "objects") + os.sep
+
+    def copy(s, d):
+        if s.startswith(objects) and not os.path.basename(s).startswith("tmp_"):
+            link_or_copy(s, d)
+        else:
+            shutil.copy2(s, d)
+
+    shutil.copytree(src, dst, dirs_exist_ok=True, copy_function=copy)
+
+
+def run_git_quiet(cwd: Path, *args) -> int:
+    """Run git command whose output is not needed; returns the exit code."""
+    return subprocess.run(
+        [GIT, "-C", str(cwd)] + list(args),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        env=GIT_ENV,
+        **SPAWN_KWARGS
+    ).returncode
+
+
+def git_output(cwd: Path, *args) -> str:
+    """Run a git query and return its stdout ("" if it printed nothing)."""
+    # -C rather than cwd=, so subprocess can use posix_spawn
+    result = subprocess.run(
+        [GIT, "-C", str(cwd)] + list(args),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        env=GIT_ENV,
+        **SPAWN_KWARGS
+    )
+    return result.stdout.decode()
+
+
+def spawn_pipe(argv, env, text: bool = False) -> subprocess.Popen:
+    """
+    Start a long-lived helper process talking over stdin/stdout pipes.
+
+    Both pipes get a full buffer (bufsize=-1); callers flush after each
+    request. Every persistent test helper goes through here, so none
+    ends up on unbuffered (bufsize=0) pipes that read byte by byte.
+    """
+    return subprocess.Popen(
+        argv,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        text=text,
+        bufsize=-1,
+        env=env,
+        **SPAWN_KWARGS
+    )
+
+
+class Session:
+    """
+    A long-lived `rewindo --batch` process.
+
+    Commands are sent as one JSON argument list per line and answered with
+    one JSON line of {rc, stdout, stderr}, so a test issuing many commands
+    pays interpreter startup and imports only once. Bound to one repository
+    if cwd is given; otherwise each command names its own with --cwd.
+    """
+
+    def __init__(self, cwd: Optional[Path] = None):
+        self.cwd = Path(cwd) if cwd else None
+        argv = [sys.executable, REWINDO_BIN, "--batch"]
+        if self.cwd:
+            argv[2:2] = ["--cwd", str(self.cwd)]
+        # No cwd= here: the process must not pin a (temporary) repo directory
+        self.proc = spawn_pipe(argv, CLI_ENV, text=True)
+
+    def call(self, *args, capture: bool = True):
+        """Run one CLI command; returns (returncode, stdout, stderr)."""
+        return self.call_many([args], capture=capture)[0]
+
+    def call_many(self, commands, capture: bool = True):
+        """
+        Run several CLI commands back to back; returns one result per command.
+
+        All commands are written before any response is read, so the
+        process never waits on us between them. Meant for short scripts:
+        the requests must fit in the pipe buffer. With capture=False the
+        commands' output is discarded and stdout/stderr come back empty.
+        """
+        requests = []
+        for args in commands:
+            argv = [str(a) for a in args]
+            requests.append(json.dumps(argv if capture else {"argv": argv, "capture": False}) + "\n")
+        self.proc.stdin.write("".join(requests))
+        self.proc.stdin.flush()
+        results = []
+        for args in commands:
+            line = self.proc.stdout.readline()
+            if not line:
+                raise RuntimeError(f"rewindo batch session exited unexpectedly running {list(args)}")
+            response = json.loads(line)
+            results.append((response["rc"], response["stdout"], response["stderr"]))
+        return results
+
+    def close(self):
+        """Close stdin and wait for the process to exit."""
+        if self.proc.poll() is None:
+            self.proc.stdin.close()
+            self.proc.wait()
+        self.proc.stdout.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+_session = None
+
+
+def run_cli(cwd: Path, *args, capture: bool = True):
+    """
+    Run rewindo CLI command in cwd through one (lazily started) shared session.
+
+    Pass capture=False when only the return code matters.
+    """
+    return run_cli_batch(cwd, [args], capture=capture)[0]
+
+
+def run_cli_batch(cwd: Path, commands, capture: bool = True):
+    """Run a list of rewindo CLI commands (argument lists) in cwd in one round trip."""
+    global _session
+    if _session is None:
+        _session = Session()
+    return _session.call_many([("--cwd", cwd) + tuple(args) for args in commands], capture=capture)
+
+
+@atexit.register
+def close_sessions():
+    """Shut down the session started by run_cli, if any."""
+    global _session
+    if _session is not None:
+        _session.close()
+        _session = None
+
+
+def run_captured(test):
+    """Run one test in a worker process and return everything it printed."""
+    buf = io.StringIO()
+    try:
+        with redirect_stdout(buf):
+            test()
+    finally:
+        close_sessions()
+    return buf.getvalue()
+
+
+def run_tests(tests):
+    """
+    Run a standalone test module's tests in parallel worker processes.
+
+    Pass --serial on the command line to run them one after another
+    instead. Each test's output is buffered and printed in test order,
+    so parallel tests never interleave their lines. Caches the caller
+    fills beforehand are inherited only where workers are forked (Linux
+    before Python 3.14); under spawn or forkserver each worker rebuilds
+    what it needs on first use, which is slower but gives the same results.
+    """
+    compile_lib()
+    if "--serial" in sys.argv[1:]:
+        for test in tests:
+            test()
+        return
+
+    workers = min(len(tests), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for output in pool.map(run_captured, tests):
+            print(output, end="")
+
+
+class GitBatch:
+    """
+    Commit onto the current branch through one long-lived `git fast-import`.
+
+    Files are streamed inline with each commit, and by default every
+    commit ends with a checkpoint so the branch ref is updated before the
+    next CLI call.
+    The first commit builds on the branch tip, if the branch exists
+    (resolved through git, so packed refs and worktrees work too).
+    Pass sync_index=False when nothing reads the index after a commit, to
+    skip the `git reset` that otherwise matches it to the new HEAD.
+    """
+
+    def __init__(self, repo: Path, sync_index: bool = True):
+        self.repo = Path(repo)
+        self.sync_index = sync_index
+        self.branch = git_output(self.repo, "symbolic-ref", "-q", "HEAD").strip().encode()
+        if not self.branch:
+            raise RuntimeError(f"HEAD is not on a branch in {self.repo}")
+        # Empty on an unborn branch: the first commit is then a root commit
+        self.parent = git_output(self.repo, "rev-parse", "-q", "--verify", "HEAD").strip().encode() or None
+        self.staged = {}
+        self.mark = 0
+        self.proc = spawn_pipe([GIT, "-C", str(self.repo), "fast-import", "--quiet"], GIT_ENV)
+
+    def write_blob(self, path: str, content: bytes):
+        """Write a file to the working tree and stage it for the next commit."""
+        (self.repo / path).write_bytes(content)
+        self.staged[path] = content
+
+    def commit(self, message: str, files: Optional[Dict[str, bytes]] = None, checkpoint: bool = True) -> str:
+        """
+        Commit the staged files plus files; returns the new commit SHA.
+
+        files are committed without being written to the working tree.
+        With checkpoint=False the branch ref (and index) are left alone
+        until a later checkpoint or close(), which saves writing a pack
+        per commit when building a long history in one go.
+        """
+        if files:
+            self.staged.update(files)
+        message = message.encode()
+        stream = [b"commit %s\nmark :%d\n" % (self.branch, self.mark + 1)]
+        stream.append(b"committer Test <test@test.com> %d +0000\n" % int(time.time()))
+        stream.append(b"data %d\n%s\n" % (len(message), message))
+        if self.mark:
+            stream.append(b"from :%d\n" % self.mark)
+        elif self.parent:
+            stream.append(b"from %s\n" % self.parent)
+        for path, content in self.staged.items():
+            stream.append(b"M 100644 inline %s\ndata %d\n%s\n" % (path.encode(), len(content), content))
+        self.mark += 1
+        self.staged.clear()
+
+        # get-mark is answered only after the checkpoint has updated the ref
+        if checkpoint:
+            stream.append(b"\ncheckpoint\n")
+        stream.append(b"\nget-mark :%d\n" % self.mark)
+        self.proc.stdin.write(b"".join(stream))
+        self.proc.stdin.flush()
+        sha = self.proc.stdout.readline().decode().strip()
+        if not sha:
+            raise RuntimeError(f"git fast-import exited while committing {message!r}")
+
+        # fast-import leaves the index alone; match it to the new HEAD
+        if self.sync_index and checkpoint:
+            run_git_quiet(self.repo, "reset", "-q")
+        return sha
+
+    def commit_file(self, path: str, content: bytes, message: str) -> str:
+        """Write one file and commit it; returns the new commit SHA."""
+        self.write_blob(path, content)
+        return self.commit(message)
+
+    def close(self):
+        """Finish the stream and wait for fast-import to exit."""
+        self.proc.stdin.close()
+        rc = self.proc.wait()
+        self.proc.stdout.close()
+        if rc != 0:
+            raise RuntimeError(f"git fast-import failed with exit code {rc}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+@functools.lru_cache(maxsize=None)
+def template_repo(files: Tuple[Tuple[str, bytes], ...] = ()) -> Tuple[Path, str]:
+    """
+    Return (repo, HEAD sha) for a repo on main with files in one commit.
+
+    Built once per file set (an empty set gives an empty commit); copy it
+    with fresh_repo or copy_repo rather than changing it.
+    """
+    repo = fresh_dir("template-")
+    # The template's config supplies the test identity
+    run_git_quiet(repo, "init", "-q", "-b", "main", f"--template={git_template()}")
+
+    # fast-import writes the objects and ref directly, skipping the
+    # work-tree scan of add + commit; GitBatch then syncs the index
+    with GitBatch(repo) as git:
+        for name, content in files:
+            git.write_blob(name, content)
+        sha = git.commit("Initial")
+    return repo, sha
+
+
+def fresh_repo(files: Optional[Dict[str, bytes]] = None) -> Tuple[Path, str]:
+    """Copy the template repo for files into a new directory; returns (repo, HEAD sha)."""
+    template, sha = template_repo(tuple(sorted((files or {}).items())))
+    repo = fresh_dir() / "repo"
+    copy_repo(template, repo)
+    return repo, sha
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""Unit tests for the `rewindo --batch` request/response protocol."""
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+from helpers import CLI_ENV, REWINDO_BIN, SPAWN_KWARGS, fresh_repo
+
+
+def empty_repo() -> Path:
+    """Return a new git repo with one (empty) commit."""
+    return fresh_repo()[0]
+
+
+def run_batch(cwd: Path, lines):
+    """
+    Feed raw request lines to one `rewindo --batch` process until EOF.
+
+    Returns (exit code, decoded responses, stderr).
+    """
+    result = subprocess.run(
+        [sys.executable, REWINDO_BIN, "--cwd", str(cwd), "--batch"],
+        input="".join(line + "\n" for line in lines),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        env=CLI_ENV,
+        **SPAWN_KWARGS
+    )
+    responses = [json.loads(line) for line in result.stdout.splitlines()]
+    return result.returncode, responses, result.stderr
+
+
+def test_malformed_line_is_answered():
+    """Test that a line that isn't JSON gets rc 2 and the session goes on."""
+    rc, responses, _ = run_batch(empty_repo(), ["not json", '["list"]'])
+
+    assert rc == 0
+    assert len(responses) == 2, f"Expected 2 responses, got {responses}"
+    assert responses[0]["rc"] == 2
+    assert responses[0]["stdout"] == ""
+    assert "invalid batch request" in responses[0]["stderr"]
+    assert responses[1] == {"rc": 0, "stdout": "No entries found\n", "stderr": ""}
+
+    print("[OK] Malformed request answered with rc 2")
+
+
+def test_request_without_argv_is_answered():
+    """Test that an object request without argv gets rc 2 and the session goes on."""
+    rc, responses, _ = run_batch(empty_repo(), ['{"capture": true}', '"list"', '["list"]'])
+
+    assert rc == 0
+    assert [r["rc"] for r in responses] == [2, 2, 0]
+    assert "argv" in responses[0]["stderr"]
+    assert "list of arguments" in responses[1]["stderr"]
+
+    print("[OK] Requests without an argument list answered with rc 2")
+
+
+def test_capture_false_discards_output():
+    """Test that capture: false runs the command but returns no output."""
+    rc, responses, _ = run_batch(empty_repo(), [
+        json.dumps({"argv": ["list"], "capture": False}),
+        json.dumps({"argv": ["list"]}),
+    ])
+
+    assert rc == 0
+    assert responses[0] == {"rc": 0, "stdout": "", "stderr": ""}
+    assert responses[1]["stdout"] == "No entries found\n"
+
+    print("[OK] capture: false discards command output")
+
+
+def test_argparse_exit_maps_to_rc_2():
+    """Test that an argparse error is reported as rc 2 instead of ending the session."""
+    rc, responses, _ = run_batch(empty_repo(), ['["no-such-command"]', '["list"]'])
+
+    assert rc == 0
+    assert responses[0]["rc"] == 2
+    assert "invalid choice" in responses[0]["stderr"]
+    assert responses[1]["rc"] == 0
+
+    print("[OK] argparse errors map to rc 2")
+
+
+def test_per_command_cwd_override():
+    """Test that a command's own --cwd overrides the session's."""
+    session_repo = empty_repo()
+    other_repo = empty_repo()
+
+    rc, responses, _ = run_batch(session_repo, [
+        json.dumps(["--cwd", str(other_repo), "capture-prompt", "--prompt", "Elsewhere"]),
+    ])
+
+    assert rc == 0
+    assert responses[0]["rc"] == 0
+    assert (other_repo / ".claude" / "data" / "prompt_state.json").exists()
+    assert not (session_repo / ".claude").exists()
+
+    print("[OK] Per-command --cwd overrides the session repo")
+
+
+def test_eof_ends_session():
+    """Test that the session answers every request, skips blank lines and exits 0 at EOF."""
+    rc, responses, stderr = run_batch(empty_repo(), ['["list"]', "", '["list"]'])
+
+    assert rc == 0, f"Batch session failed: {stderr}"
+    assert len(responses) == 2
+    assert stderr == ""
+
+    # No requests at all
+    rc, responses, _ = run_batch(empty_repo(), [])
+    assert rc == 0
+    assert responses == []
+
+    print("[OK] Session exits cleanly at EOF")
+
+
+def main():
+    """Run all tests."""
+    print("=" * 60)
+    print("Batch Mode Protocol Tests")
+    print("=" * 60)
+
+    test_malformed_line_is_answered()
+    test_request_without_argv_is_answered()
+    test_capture_false_discards_output()
+    test_argparse_exit_maps_to_rc_2()
+    test_per_command_cwd_override()
+    test_eof_ends_session()
+
+    print("=" * 60)
+    print("[SUCCESS] All batch mode tests passed!")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,5 @@
 #!/usr/bin/env python3
-"""Unit tests for rewindo capture-prompt and capture-stop commands."""
+"""Unit tests for rewindo capture-prompt, capture-stop and capture commands."""
 
 import json
 import subprocess
@@ -128,6 +128,85 @@ def test_capture_stop_creates_assistant_step():
         print("[OK] capture-stop creates assistant step")
 
 
+def test_capture_combines_prompt_and_stop():
+    """Test that capture records the prompt and assistant step in one call."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        test_repo = Path(tmp_dir) / "test-repo"
+        test_repo.mkdir()
+
+        # Initialize git repo
+        run_git(test_repo, "init")
+        run_git(test_repo, "config", "user.email", "test@test.com")
+        run_git(test_repo, "config", "user.name", "Test")
+        (test_repo / "file.txt").write_text("initial\n")
+        run_git(test_repo, "add", "-A")
+        run_git(test_repo, "commit", "-m", "Initial")
+
+        # Claude's changes are already committed
+        (test_repo / "feature.txt").write_text("new feature\n")
+        run_git(test_repo, "add", "-A")
+        run_git(test_repo, "commit", "-m", "Add feature")
+
+        returncode, stdout, stderr = run_cli(
+            test_repo, "capture",
+            "--prompt", "Add a feature"
+        )
+        assert returncode == 0, f"capture failed: {stderr}"
+        assert "Assistant step #1 created" in stderr, f"Expected assistant step: {stderr}"
+
+        # Prompt state is consumed, as after capture-stop
+        prompt_state_file = test_repo / ".claude" / "data" / "prompt_state.json"
+        assert not prompt_state_file.exists(), "prompt_state.json should be cleaned up"
+
+        timeline_file = test_repo / ".claude" / "data" / "timeline.jsonl"
+        entry = json.loads(timeline_file.read_text().splitlines()[-1])
+        assert entry["actor"] == "assistant"
+        assert entry["prompt"] == "Add a feature"
+
+        print("[OK] capture records prompt and assistant step in one call")
+
+
+def test_capture_requires_prompt():
+    """Test that capture without prompt text stops before capture-stop."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        test_repo = Path(tmp_dir) / "test-repo"
+        test_repo.mkdir()
+
+        # Initialize git repo
+        run_git(test_repo, "init")
+        run_git(test_repo, "config", "user.email", "test@test.com")
+        run_git(test_repo, "config", "user.name", "Test")
+        (test_repo / "file.txt").write_text("initial\n")
+        run_git(test_repo, "add", "-A")
+        run_git(test_repo, "commit", "-m", "Initial")
+
+        # An earlier prompt leaves its state behind
+        returncode, stdout, stderr = run_cli(test_repo, "capture-prompt", "--prompt", "Earlier prompt")
+        assert returncode == 0, f"capture-prompt failed: {stderr}"
+        prompt_state_file = test_repo / ".claude" / "data" / "prompt_state.json"
+        assert prompt_state_file.exists()
+
+        (test_repo / "feature.txt").write_text("new feature\n")
+        run_git(test_repo, "add", "-A")
+        run_git(test_repo, "commit", "-m", "Add feature")
+
+        # No prompt option at all is a usage error
+        returncode, stdout, stderr = run_cli(test_repo, "capture")
+        assert returncode == 2, f"Expected usage error, got {returncode}: {stderr}"
+
+        # An empty prompt is refused too
+        returncode, stdout, stderr = run_cli(test_repo, "capture", "--prompt", "")
+        assert returncode == 1, f"Expected failure, got {returncode}: {stderr}"
+        assert "No prompt provided" in stderr
+
+        # Neither call recorded a step for the earlier prompt
+        assert prompt_state_file.exists(), "prompt_state.json should be left for capture-stop"
+        timeline_file = test_repo / ".claude" / "data" / "timeline.jsonl"
+        assert not timeline_file.exists() or not timeline_file.read_text().strip()
+
+        print("[OK] capture requires a prompt")
+
+
 def test_capture_prompt_saves_prompt_state():
     """Test that capture-prompt saves prompt state for capture-stop."""
     with tempfile.TemporaryDirectory() as tmp_dir:
@@ -343,6 +422,8 @@ def main():
 
     test_capture_prompt_creates_user_step()
     test_capture_stop_creates_assistant_step()
+    test_capture_combines_prompt_and_stop()
+    test_capture_requires_prompt()
     test_capture_prompt_saves_prompt_state()
     test_full_workflow_user_assistant_user()
     test_state_file_updated()
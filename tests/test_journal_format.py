@@ -5,7 +5,11 @@ import json
 import subprocess
 import sys
 import tempfile
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Any, Callable
+
+import pytest
 
 # Add lib to path
 LIB_DIR = Path(__file__).parent.parent / "lib"
@@ -25,303 +29,255 @@ def run_git(cwd: Path, *args):
     return result.returncode, result.stdout, result.stderr
 
 
-def test_normalize_entry_adds_actor_to_old_entries():
-    """Test that _normalize_entry adds actor='assistant' to old entries."""
-    with tempfile.TemporaryDirectory() as tmp_dir:
-        test_repo = Path(tmp_dir) / "test-repo"
-        test_repo.mkdir()
+def make_rewindo(base_dir: Path) -> Rewindo:
+    """Initialize a git repo with one empty commit and return a Rewindo for it."""
+    test_repo = Path(base_dir) / "test-repo"
+    test_repo.mkdir()
 
-        # Initialize git repo
-        run_git(test_repo, "init")
-        run_git(test_repo, "config", "user.email", "test@test.com")
-        run_git(test_repo, "config", "user.name", "Test")
-        run_git(test_repo, "commit", "--allow-empty", "-m", "Initial")
+    run_git(test_repo, "init")
+    run_git(test_repo, "config", "user.email", "test@test.com")
+    run_git(test_repo, "config", "user.name", "Test")
+    run_git(test_repo, "commit", "--allow-empty", "-m", "Initial")
 
-        # Create Rewindo instance
-        rewindo = Rewindo(str(test_repo))
+    return Rewindo(str(test_repo))
 
-        # Old format entry (no actor)
-        old_entry = {
-            "id": 1,
-            "ts": "2026-02-01T10:00:00",
-            "session": "test",
-            "prompt": "Add feature",
-            "checkpoint_sha": "abc123"
-        }
 
-        # Normalize
-        normalized = rewindo._normalize_entry(old_entry.copy())
+def write_old_entries(rewindo: Rewindo, *entries: dict) -> None:
+    """Write raw (pre-actor) entries straight into the timeline file."""
+    with open(rewindo._get_timeline_path(), "a") as f:
+        for entry in entries:
+            f.write(json.dumps(entry) + "\n")
+
 
-        assert normalized["actor"] == "assistant", "Old entries should default to assistant"
-        assert "parent_sha" in normalized, "Should have parent_sha field"
-        assert normalized["parent_sha"] is None, "parent_sha should be None for old entries"
+@dataclass
+class Scenario:
+    """One journal-format case: prepare the timeline, act on it, check the result."""
+    name: str
+    description: str
+    act: Callable[[Rewindo], Any]
+    assert_on: Callable[[Any], None]
+    prepare: Callable[[Rewindo], None] = lambda rewindo: None
 
-        print("[OK] Old entries get actor='assistant' by default")
+    def run(self, rewindo: Rewindo) -> None:
+        self.prepare(rewindo)
+        self.assert_on(self.act(rewindo))
+        print(f"[OK] {self.description}")
 
 
-def test_normalize_entry_preserves_new_fields():
-    """Test that _normalize_entry preserves actor and parent_sha in new entries."""
-    with tempfile.TemporaryDirectory() as tmp_dir:
-        test_repo = Path(tmp_dir) / "test-repo"
-        test_repo.mkdir()
+OLD_ENTRY = {
+    "id": 1,
+    "ts": "2026-02-01T10:00:00",
+    "session": "test",
+    "prompt": "Add feature",
+    "checkpoint_sha": "abc123"
+}
 
-        # Initialize git repo
-        run_git(test_repo, "init")
-        run_git(test_repo, "config", "user.email", "test@test.com")
-        run_git(test_repo, "config", "user.name", "Test")
-        run_git(test_repo, "commit", "--allow-empty", "-m", "Initial")
 
-        # Create Rewindo instance
-        rewindo = Rewindo(str(test_repo))
+# --- normalize_old ---
+
+def _check_normalize_old(normalized):
+    assert normalized["actor"] == "assistant", "Old entries should default to assistant"
+    assert "parent_sha" in normalized, "Should have parent_sha field"
+    assert normalized["parent_sha"] is None, "parent_sha should be None for old entries"
+
+
+# --- normalize_new ---
+
+def _act_normalize_new(rewindo):
+    new_entry = {
+        "id": 1,
+        "ts": "2026-02-01T10:00:00",
+        "actor": "user",
+        "parent_sha": "def456",
+        "message": "Manual edits"
+    }
+    return rewindo._normalize_entry(new_entry)
+
+
+def _check_normalize_new(normalized):
+    assert normalized["actor"] == "user", "Should preserve actor='user'"
+    assert normalized["parent_sha"] == "def456", "Should preserve parent_sha"
+
+
+# --- list_includes_actor ---
+
+def _prepare_list_includes_actor(rewindo):
+    rewindo.append_entry(
+        actor="user",
+        checkpoint_sha="abc123",
+        files=[{"path": "test.txt", "status": "M"}],
+        message="Manual edits"
+    )
+
+
+def _check_list_includes_actor(entries):
+    assert len(entries) == 1, "Should have 1 entry"
+    assert entries[0]["actor"] == "user", "Should include actor"
 
-        # New format entry
-        new_entry = {
-            "id": 1,
-            "ts": "2026-02-01T10:00:00",
-            "actor": "user",
-            "parent_sha": "def456",
-            "message": "Manual edits"
-        }
 
-        # Normalize
-        normalized = rewindo._normalize_entry(new_entry.copy())
-
-        assert normalized["actor"] == "user", "Should preserve actor='user'"
-        assert normalized["parent_sha"] == "def456", "Should preserve parent_sha"
-
-        print("[OK] New entries preserve actor and parent_sha")
-
-
-def test_list_entries_includes_actor():
-    """Test that list_entries includes actor in results."""
-    with tempfile.TemporaryDirectory() as tmp_dir:
-        test_repo = Path(tmp_dir) / "test-repo"
-        test_repo.mkdir()
-
-        # Initialize git repo
-        run_git(test_repo, "init")
-        run_git(test_repo, "config", "user.email", "test@test.com")
-        run_git(test_repo, "config", "user.name", "Test")
-        run_git(test_repo, "commit", "--allow-empty", "-m", "Initial")
-
-        # Create Rewindo instance
-        rewindo = Rewindo(str(test_repo))
-
-        # Create a user entry
-        rewindo.append_entry(
-            actor="user",
-            checkpoint_sha="abc123",
-            files=[{"path": "test.txt", "status": "M"}],
-            message="Manual edits"
-        )
-
-        # List entries
-        entries = rewindo.list_entries()
-
-        assert len(entries) == 1, "Should have 1 entry"
-        assert entries[0]["actor"] == "user", "Should include actor"
-
-        print("[OK] list_entries includes actor")
-
-
-def test_list_entries_can_filter_by_actor():
-    """Test that list_entries can filter by actor."""
-    with tempfile.TemporaryDirectory() as tmp_dir:
-        test_repo = Path(tmp_dir) / "test-repo"
-        test_repo.mkdir()
-
-        # Initialize git repo
-        run_git(test_repo, "init")
-        run_git(test_repo, "config", "user.email", "test@test.com")
-        run_git(test_repo, "config", "user.name", "Test")
-        run_git(test_repo, "commit", "--allow-empty", "-m", "Initial")
-
-        # Create Rewindo instance
-        rewindo = Rewindo(str(test_repo))
-
-        # Create mixed entries
-        rewindo.append_entry(
-            actor="assistant",
-            checkpoint_sha="abc111",
-            files=[],
-            prompt="Prompt 1"
-        )
-        rewindo.append_entry(
-            actor="user",
-            checkpoint_sha="abc222",
-            files=[],
-            message="Manual edit 1"
-        )
-        rewindo.append_entry(
-            actor="assistant",
-            checkpoint_sha="abc333",
-            files=[],
-            prompt="Prompt 2"
-        )
-
-        # Filter by actor
-        user_entries = rewindo.list_entries(actor="user")
-        assistant_entries = rewindo.list_entries(actor="assistant")
-
-        assert len(user_entries) == 1, "Should have 1 user entry"
-        assert len(assistant_entries) == 2, "Should have 2 assistant entries"
-        assert user_entries[0]["actor"] == "user"
-
-        print("[OK] Can filter entries by actor")
-
-
-def test_get_entry_normalizes_old_entries():
-    """Test that get_entry normalizes old entries."""
-    with tempfile.TemporaryDirectory() as tmp_dir:
-        test_repo = Path(tmp_dir) / "test-repo"
-        test_repo.mkdir()
-
-        # Initialize git repo
-        run_git(test_repo, "init")
-        run_git(test_repo, "config", "user.email", "test@test.com")
-        run_git(test_repo, "config", "user.name", "Test")
-        run_git(test_repo, "commit", "--allow-empty", "-m", "Initial")
-
-        # Create Rewindo instance
-        rewindo = Rewindo(str(test_repo))
-
-        # Manually write an old-format entry
-        timeline_path = rewindo._get_timeline_path()
-        old_entry = {
-            "id": 1,
+# --- filter_by_actor ---
+
+def _prepare_filter_by_actor(rewindo):
+    rewindo.append_entry(actor="assistant", checkpoint_sha="abc111", files=[], prompt="Prompt 1")
+    rewindo.append_entry(actor="user", checkpoint_sha="abc222", files=[], message="Manual edit 1")
+    rewindo.append_entry(actor="assistant", checkpoint_sha="abc333", files=[], prompt="Prompt 2")
+
+
+def _act_filter_by_actor(rewindo):
+    return rewindo.list_entries(actor="user"), rewindo.list_entries(actor="assistant")
+
+
+def _check_filter_by_actor(result):
+    user_entries, assistant_entries = result
+    assert len(user_entries) == 1, "Should have 1 user entry"
+    assert len(assistant_entries) == 2, "Should have 2 assistant entries"
+    assert user_entries[0]["actor"] == "user"
+
+
+# --- get_entry_normalizes_old ---
+
+def _check_get_entry_normalizes_old(entry):
+    assert entry is not None, "Should find entry"
+    assert entry["actor"] == "assistant", "Should normalize to assistant"
+    assert "parent_sha" in entry, "Should have parent_sha field"
+
+
+# --- append_user_entry ---
+
+def _act_append_user_entry(rewindo):
+    entry_id = rewindo.append_entry(
+        actor="user",
+        checkpoint_sha="abc123",
+        files=[{"path": "test.txt", "status": "M", "additions": 5, "deletions": 2}],
+        message="Manual edits",
+        parent_sha="def456",
+        session="test-session"
+    )
+    return entry_id, rewindo.get_entry(entry_id)
+
+
+def _check_append_user_entry(result):
+    entry_id, entry = result
+    assert entry_id == 1, "Entry ID should be 1"
+    assert entry["actor"] == "user"
+    assert entry["checkpoint_sha"] == "abc123"
+    assert entry["parent_sha"] == "def456"
+    assert entry["message"] == "Manual edits"
+    assert entry["session"] == "test-session"
+    assert len(entry["files"]) == 1
+    assert entry["files"][0]["path"] == "test.txt"
+
+
+# --- append_assistant_entry ---
+
+def _act_append_assistant_entry(rewindo):
+    entry_id = rewindo.append_entry(
+        actor="assistant",
+        checkpoint_sha="abc123",
+        files=[],
+        prompt="Add authentication feature",
+        session="test-session"
+    )
+    return rewindo.get_entry(entry_id)
+
+
+def _check_append_assistant_entry(entry):
+    assert entry["actor"] == "assistant"
+    assert entry["prompt"] == "Add authentication feature"
+    assert "message" not in entry, "Assistant entries shouldn't have message"
+    assert "prompt_ref" in entry, "Should have prompt_ref"
+
+
+# --- read_old_timeline ---
+
+def _prepare_read_old_timeline(rewindo):
+    write_old_entries(rewindo, *[
+        {
+            "id": i + 1,
             "ts": "2026-02-01T10:00:00",
             "session": "test",
-            "prompt": "Add feature",
-            "checkpoint_sha": "abc123"
+            "prompt": f"Prompt {i+1}",
+            "checkpoint_sha": f"abc{i}23",
+            "files": [],
+            "labels": [],
+            "notes": ""
         }
-        with open(timeline_path, "a") as f:
-            f.write(json.dumps(old_entry) + "\n")
-
-        # Get entry
-        entry = rewindo.get_entry(1)
-
-        assert entry is not None, "Should find entry"
-        assert entry["actor"] == "assistant", "Should normalize to assistant"
-        assert "parent_sha" in entry, "Should have parent_sha field"
-
-        print("[OK] get_entry normalizes old entries")
-
-
-def test_append_entry_creates_new_format():
-    """Test that append_entry creates entries with new format."""
-    with tempfile.TemporaryDirectory() as tmp_dir:
-        test_repo = Path(tmp_dir) / "test-repo"
-        test_repo.mkdir()
-
-        # Initialize git repo
-        run_git(test_repo, "init")
-        run_git(test_repo, "config", "user.email", "test@test.com")
-        run_git(test_repo, "config", "user.name", "Test")
-        run_git(test_repo, "commit", "--allow-empty", "-m", "Initial")
-
-        # Create Rewindo instance
-        rewindo = Rewindo(str(test_repo))
-
-        # Append user entry
-        entry_id = rewindo.append_entry(
-            actor="user",
-            checkpoint_sha="abc123",
-            files=[{"path": "test.txt", "status": "M", "additions": 5, "deletions": 2}],
-            message="Manual edits",
-            parent_sha="def456",
-            session="test-session"
-        )
-
-        assert entry_id == 1, "Entry ID should be 1"
-
-        # Get the entry and verify
-        entry = rewindo.get_entry(entry_id)
-
-        assert entry["actor"] == "user"
-        assert entry["checkpoint_sha"] == "abc123"
-        assert entry["parent_sha"] == "def456"
-        assert entry["message"] == "Manual edits"
-        assert entry["session"] == "test-session"
-        assert len(entry["files"]) == 1
-        assert entry["files"][0]["path"] == "test.txt"
-
-        print("[OK] append_entry creates new format entries")
-
-
-def test_append_entry_for_assistant():
-    """Test that append_entry works for assistant steps."""
-    with tempfile.TemporaryDirectory() as tmp_dir:
-        test_repo = Path(tmp_dir) / "test-repo"
-        test_repo.mkdir()
-
-        # Initialize git repo
-        run_git(test_repo, "init")
-        run_git(test_repo, "config", "user.email", "test@test.com")
-        run_git(test_repo, "config", "user.name", "Test")
-        run_git(test_repo, "commit", "--allow-empty", "-m", "Initial")
-
-        # Create Rewindo instance
-        rewindo = Rewindo(str(test_repo))
-
-        # Append assistant entry
-        entry_id = rewindo.append_entry(
-            actor="assistant",
-            checkpoint_sha="abc123",
-            files=[],
-            prompt="Add authentication feature",
-            session="test-session"
-        )
-
-        # Get the entry and verify
-        entry = rewindo.get_entry(entry_id)
-
-        assert entry["actor"] == "assistant"
-        assert entry["prompt"] == "Add authentication feature"
-        assert "message" not in entry, "Assistant entries shouldn't have message"
-        assert "prompt_ref" in entry, "Should have prompt_ref"
-
-        print("[OK] append_entry works for assistant steps")
-
-
-def test_backward_compatibility_reading_old_timeline():
-    """Test that old timelines can still be read correctly."""
-    with tempfile.TemporaryDirectory() as tmp_dir:
-        test_repo = Path(tmp_dir) / "test-repo"
-        test_repo.mkdir()
-
-        # Initialize git repo
-        run_git(test_repo, "init")
-        run_git(test_repo, "config", "user.email", "test@test.com")
-        run_git(test_repo, "config", "user.name", "Test")
-        run_git(test_repo, "commit", "--allow-empty", "-m", "Initial")
-
-        # Create Rewindo instance
-        rewindo = Rewindo(str(test_repo))
-
-        # Manually write old-format entries
-        timeline_path = rewindo._get_timeline_path()
-        for i in range(3):
-            old_entry = {
-                "id": i + 1,
-                "ts": "2026-02-01T10:00:00",
-                "session": "test",
-                "prompt": f"Prompt {i+1}",
-                "checkpoint_sha": f"abc{i}23",
-                "files": [],
-                "labels": [],
-                "notes": ""
-            }
-            with open(timeline_path, "a") as f:
-                f.write(json.dumps(old_entry) + "\n")
-
-        # List entries - should work without errors
-        entries = rewindo.list_entries()
-
-        assert len(entries) == 3, "Should read all old entries"
-        for entry in entries:
-            assert entry["actor"] == "assistant", "All should default to assistant"
-
-        print("[OK] Old timelines are readable with backward compatibility")
+        for i in range(3)
+    ])
+
+
+def _check_read_old_timeline(entries):
+    assert len(entries) == 3, "Should read all old entries"
+    for entry in entries:
+        assert entry["actor"] == "assistant", "All should default to assistant"
+
+
+SCENARIOS = [
+    Scenario(
+        name="normalize_old",
+        description="Old entries get actor='assistant' by default",
+        act=lambda rewindo: rewindo._normalize_entry(OLD_ENTRY.copy()),
+        assert_on=_check_normalize_old,
+    ),
+    Scenario(
+        name="normalize_new",
+        description="New entries preserve actor and parent_sha",
+        act=_act_normalize_new,
+        assert_on=_check_normalize_new,
+    ),
+    Scenario(
+        name="list_includes_actor",
+        description="list_entries includes actor",
+        prepare=_prepare_list_includes_actor,
+        act=lambda rewindo: rewindo.list_entries(),
+        assert_on=_check_list_includes_actor,
+    ),
+    Scenario(
+        name="filter_by_actor",
+        description="Can filter entries by actor",
+        prepare=_prepare_filter_by_actor,
+        act=_act_filter_by_actor,
+        assert_on=_check_filter_by_actor,
+    ),
+    Scenario(
+        name="get_entry_normalizes_old",
+        description="get_entry normalizes old entries",
+        prepare=lambda rewindo: write_old_entries(rewindo, OLD_ENTRY),
+        act=lambda rewindo: rewindo.get_entry(1),
+        assert_on=_check_get_entry_normalizes_old,
+    ),
+    Scenario(
+        name="append_user_entry",
+        description="append_entry creates new format entries",
+        act=_act_append_user_entry,
+        assert_on=_check_append_user_entry,
+    ),
+    Scenario(
+        name="append_assistant_entry",
+        description="append_entry works for assistant steps",
+        act=_act_append_assistant_entry,
+        assert_on=_check_append_assistant_entry,
+    ),
+    Scenario(
+        name="read_old_timeline",
+        description="Old timelines are readable with backward compatibility",
+        prepare=_prepare_read_old_timeline,
+        act=lambda rewindo: rewindo.list_entries(),
+        assert_on=_check_read_old_timeline,
+    ),
+]
+
+
+@pytest.fixture
+def fresh_rewindo(tmp_path):
+    """Rewindo instance on a fresh single-commit repo (one per scenario)."""
+    return make_rewindo(tmp_path)
+
+
+@pytest.mark.parametrize("scenario", SCENARIOS, ids=lambda s: s.name)
+def test_journal(scenario, fresh_rewindo):
+    """Run one journal-format scenario against its own fresh repo."""
+    scenario.run(fresh_rewindo)
 
 
 def main():
@@ -330,14 +286,9 @@ def main():
     print("Journal Format Unit Tests")
     print("=" * 60)
 
-    test_normalize_entry_adds_actor_to_old_entries()
-    test_normalize_entry_preserves_new_fields()
-    test_list_entries_includes_actor()
-    test_list_entries_can_filter_by_actor()
-    test_get_entry_normalizes_old_entries()
-    test_append_entry_creates_new_format()
-    test_append_entry_for_assistant()
-    test_backward_compatibility_reading_old_timeline()
+    for scenario in SCENARIOS:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            scenario.run(make_rewindo(Path(tmp_dir)))
 
     print("=" * 60)
     print("[SUCCESS] All journal format tests passed!")
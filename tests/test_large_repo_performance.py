@@ -6,9 +6,14 @@ This test verifies that Rewindo performs well with larger repositories:
 - 100+ timeline entries
 - Commands complete within acceptable time limits
 - List operations with high limit work efficiently
+
+When run directly, the tests execute in parallel worker processes;
+pass --serial to run them one after another.
 """
 
-import subprocess
+import os
+import shutil
+import statistics
 import sys
 import tempfile
 import time
@@ -18,61 +23,29 @@ from pathlib import Path
 LIB_DIR = Path(__file__).parent.parent / "lib"
 sys.path.insert(0, str(LIB_DIR))
 
-
-def run_git(cwd: Path, *args):
-    """Run git command."""
-    result = subprocess.run(
-        ["git"] + list(args),
-        cwd=cwd,
-        capture_output=True,
-        text=True
-    )
-    return result.returncode, result.stdout, result.stderr
-
-
-def run_cli(cwd: Path, *args):
-    """Run rewindo CLI command."""
-    project_root = Path(__file__).parent.parent
-    env = {**subprocess.os.environ, 'PYTHONPATH': str(project_root / 'lib')}
-    result = subprocess.run(
-        [sys.executable, str(project_root / "bin" / "rewindo"), "--cwd", str(cwd)] + list(args),
-        cwd=cwd,
-        capture_output=True,
-        text=True,
-        env=env
-    )
-    return result.returncode, result.stdout, result.stderr
+from helpers import GitBatch, run_cli, run_git_quiet, run_tests, close_sessions, fast_tmp, git_template
 
 
-def create_large_repo(cwd: Path, num_files: int = 100):
-    """Create a repository with many files."""
-    src_dir = cwd / "src"
-    src_dir.mkdir()
-
-    # Create multiple Python files
-    for i in range(num_files):
-        file_path = src_dir / f"module_{i:03d}.py"
-        content = f"""# Module {i}
-class Class{i}:
+# File templates, encoded once and filled in with bytes %-formatting
+MODULE_TEMPLATE = b"""# Module %(i)d
+class Class%(i)d:
     def __init__(self):
-        self.value = {i}
-        self.name = "module_{i}"
+        self.value = %(i)d
+        self.name = "module_%(i)d"
 
-    def method_{i}(self):
-        return self.value * {i % 10}
+    def method_%(i)d(self):
+        return self.value * %(factor)d
 
     def compute(self):
         result = 0
         for j in range(100):
-            result += self.method_{i}()
+            result += self.method_%(i)d()
         return result
 
-CONSTANT_{i} = {i * 123}
+CONSTANT_%(i)d = %(constant)d
 """
-        file_path.write_text(content)
 
-    # Create a main file
-    (cwd / "main.py").write_text("""# Main application
+MAIN_FILE = b"""# Main application
 from src.module_000 import Class000
 
 def main():
@@ -81,127 +54,207 @@ def main():
 
 if __name__ == "__main__":
     main()
-""")
-
-    # Initialize git
-    run_git(cwd, "init")
-    run_git(cwd, "config", "user.email", "test@test.com")
-    run_git(cwd, "config", "user.name", "Test")
-    run_git(cwd, "add", "-A")
-    run_git(cwd, "commit", "-m", "Initial commit")
-
-
-def create_many_checkpoints(cwd: Path, num_checkpoints: int = 50):
-    """Create many timeline entries."""
-    print(f"Creating {num_checkpoints} checkpoints...")
+"""
 
-    for i in range(num_checkpoints):
-        # Update a file
-        if i % 3 == 0:
-            # Modify main.py
-            (cwd / "main.py").write_text(f"""# Main application
-# Version {i}
-from src.module_{i:03d} import Class{i}
+MAIN_CHECKPOINT_TEMPLATE = b"""# Main application
+# Version %(i)d
+from src.module_%(i)03d import Class%(i)d
 
 def main():
-    obj = Class{i}()
-    print(obj.name, "version", {i})
+    obj = Class%(i)d()
+    print(obj.name, "version", %(i)d)
 
 if __name__ == "__main__":
     main()
-""")
-        elif i % 3 == 1:
-            # Modify a specific module
-            module_num = i % 100
-            (cwd / "src" / f"module_{module_num:03d}.py").write_text(f"""# Module {module_num}
-# Updated at checkpoint {i}
-class Class{module_num}:
+"""
+
+MODULE_CHECKPOINT_TEMPLATE = b"""# Module %(module)d
+# Updated at checkpoint %(i)d
+class Class%(module)d:
     def __init__(self):
-        self.value = {module_num}
-        self.checkpoint = {i}
-""")
-        else:
-            # Create a new file
-            (cwd / f"file_{i}.txt").write_text(f"File {i} content\n")
+        self.value = %(module)d
+        self.checkpoint = %(i)d
+"""
+
+NEW_FILE_TEMPLATE = b"File %(i)d content\n"
 
-        # Commit
-        run_git(cwd, "add", "-A")
-        run_git(cwd, "commit", "-m", f"Checkpoint {i}")
+
+def create_large_repo(cwd: Path, num_files: int = 100):
+    """Create a repository with many files."""
+    files = {
+        f"src/module_{i:03d}.py": MODULE_TEMPLATE % {b"i": i, b"factor": i % 10, b"constant": i * 123}
+        for i in range(num_files)
+    }
+    files["main.py"] = MAIN_FILE
+
+    # Initialize git
+    run_git_quiet(cwd, "init", "-q", f"--template={git_template()}")
+
+    # Commit every file in one stream, then let git write the working tree
+    # (checkout.workers=0 spreads the file writes over one worker per core)
+    with GitBatch(cwd, sync_index=False) as git:
+        git.commit("Initial commit", files, checkpoint=False)
+    run_git_quiet(cwd, "-c", "checkout.workers=0", "reset", "-q", "--hard")
+
+
+def checkpoint_file(i: int):
+    """Return the (path, content) changed by checkpoint i."""
+    if i % 3 == 0:
+        # Modify main.py
+        return "main.py", MAIN_CHECKPOINT_TEMPLATE % {b"i": i}
+    elif i % 3 == 1:
+        # Modify a specific module
+        module_num = i % 100
+        return f"src/module_{module_num:03d}.py", MODULE_CHECKPOINT_TEMPLATE % {b"module": module_num, b"i": i}
+    else:
+        # Create a new file
+        return f"file_{i}.txt", NEW_FILE_TEMPLATE % {b"i": i}
+
+
+def create_many_checkpoints(cwd: Path, num_checkpoints: int = 50, start: int = 0):
+    """
+    Create many timeline entries (checkpoints start..num_checkpoints-1).
+
+    Each checkpoint commit holds only the project files. .claude/ stays
+    untracked, as in a real project. Committing it (as a `git add -A`
+    per checkpoint once did) would let the `reset --hard` in revert roll
+    the timeline back to an older copy.
+    """
+    print(f"Creating {num_checkpoints - start} checkpoints...")
+
+    # Build the whole commit history in one fast-import run
+    with GitBatch(cwd, sync_index=False) as git:
+        shas = [
+            git.commit(f"Checkpoint {i}", dict([checkpoint_file(i)]), checkpoint=False)
+            for i in range(start, num_checkpoints)
+        ]
+
+    for i, sha in enumerate(shas, start=start):
+        # Move HEAD and the working tree to this checkpoint's commit
+        run_git_quiet(cwd, "reset", "-q", "--hard", sha)
 
         # Create rewindo checkpoint
-        run_cli(cwd, "capture-prompt", "--prompt", f"Update {i}")
-        run_cli(cwd, "capture-stop")
+        run_cli(cwd, "capture", "--prompt", f"Update {i}")
 
         if (i + 1) % 10 == 0:
             print(f"       {i + 1}/{num_checkpoints} checkpoints created")
 
 
-def measure_time(func, *args):
-    """Measure execution time of a function."""
-    start = time.time()
-    result = func(*args)
-    end = time.time()
-    return end - start, result
+# Base repos built once per process, keyed by (num_files, num_checkpoints)
+_BASE_ROOT = tempfile.TemporaryDirectory(dir=fast_tmp())
+_BASE_CACHE = {}
+
+
+def clone_repo(source: Path, dest: Path):
+    """Cheaply copy a prepared repo: shared-object clone plus rewindo refs and data."""
+    run_git_quiet(
+        dest.parent, "-c", "checkout.workers=0",
+        "clone", "-q", "--local", "--shared", f"--template={git_template()}", str(source), str(dest)
+    )
+    run_git_quiet(dest, "fetch", "-q", "origin", "+refs/rewindo/*:refs/rewindo/*")
+    # Copied rather than hardlinked: tests rewrite the timeline in place
+    shutil.copytree(source / ".claude", dest / ".claude")
+
+
+def base_repo(num_files: int, num_checkpoints: int) -> Path:
+    """
+    Return a cached repo with num_files files and num_checkpoints entries.
+
+    Checkpoint histories are deterministic, so a larger base is built by
+    cloning the largest cached base with the same file count and adding
+    only the missing checkpoints.
+    """
+    key = (num_files, num_checkpoints)
+    if key in _BASE_CACHE:
+        return _BASE_CACHE[key]
+
+    repo = Path(_BASE_ROOT.name) / f"base-{num_files}-{num_checkpoints}"
+    prefixes = [n for (f, n) in _BASE_CACHE if f == num_files and n <= num_checkpoints]
+    if prefixes:
+        start = max(prefixes)
+        clone_repo(_BASE_CACHE[(num_files, start)], repo)
+    else:
+        start = 0
+        repo.mkdir()
+        create_large_repo(repo, num_files=num_files)
+
+    create_many_checkpoints(repo, num_checkpoints=num_checkpoints, start=start)
+    _BASE_CACHE[key] = repo
+    return repo
+
+
+def measure_time(func, *args, rounds: int = 1, warmup: int = 0):
+    """
+    Measure execution time of a function.
+
+    Runs func warmup times untimed, then rounds times timed, and returns
+    (median elapsed seconds, result of the last call). Only repeat
+    commands that are safe to run more than once (list/show/search).
+    """
+    for _ in range(warmup):
+        func(*args)
+
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        result = func(*args)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), result
 
 
 def test_list_performance_with_many_entries():
     """Test that list command performs well with many entries."""
-    with tempfile.TemporaryDirectory() as tmp_dir:
+    with tempfile.TemporaryDirectory(dir=fast_tmp()) as tmp_dir:
         test_repo = Path(tmp_dir) / "test-perf"
-        test_repo.mkdir()
 
         print("\n=== Phase 8.5: Large Repository Performance Tests ===\n")
 
         # Setup: Create repo with many files and checkpoints
         print("[1/6] Setting up large repository (100 files)...")
-        create_large_repo(test_repo, num_files=100)
-
         print("[2/6] Creating 30 timeline entries...")
-        create_many_checkpoints(test_repo, num_checkpoints=30)
+        clone_repo(base_repo(100, 30), test_repo)
 
         # Test list with default limit
         print("[3/6] TEST: List with default limit (20)...")
-        elapsed, (rc, stdout, stderr) = measure_time(run_cli, test_repo, "list")
+        elapsed, (rc, stdout, stderr) = measure_time(run_cli, test_repo, "list", rounds=5, warmup=1)
         assert rc == 0, f"List command failed: {stderr}"
-        assert elapsed < 2.0, f"List took {elapsed:.2f}s, should be < 2s"
-        print(f"       [OK] List(20) completed in {elapsed:.2f}s")
+        assert elapsed < 2.0, f"List median {elapsed:.2f}s, should be < 2s"
+        print(f"       [OK] List(20) median {elapsed:.3f}s over 5 runs")
 
         # Test list with high limit
         print("[4/6] TEST: List with high limit (100)...")
-        elapsed, (rc, stdout, stderr) = measure_time(run_cli, test_repo, "list", "--limit", "100")
+        elapsed, (rc, stdout, stderr) = measure_time(run_cli, test_repo, "list", "--limit", "100", rounds=5, warmup=1)
         assert rc == 0, f"List command failed: {stderr}"
-        assert elapsed < 3.0, f"List(100) took {elapsed:.2f}s, should be < 3s"
-        print(f"       [OK] List(100) completed in {elapsed:.2f}s")
+        assert elapsed < 3.0, f"List(100) median {elapsed:.2f}s, should be < 3s"
+        print(f"       [OK] List(100) median {elapsed:.3f}s over 5 runs")
 
         # Test show command
         print("[5/6] TEST: Show command performance...")
-        elapsed, (rc, stdout, stderr) = measure_time(run_cli, test_repo, "show", "15")
+        elapsed, (rc, stdout, stderr) = measure_time(run_cli, test_repo, "show", "15", rounds=5, warmup=1)
         assert rc == 0, f"Show command failed: {stderr}"
-        assert elapsed < 1.0, f"Show took {elapsed:.2f}s, should be < 1s"
-        print(f"       [OK] Show completed in {elapsed:.2f}s")
+        assert elapsed < 1.0, f"Show median {elapsed:.2f}s, should be < 1s"
+        print(f"       [OK] Show median {elapsed:.3f}s over 5 runs")
 
         # Test search
         print("[6/6] TEST: Search performance...")
-        elapsed, (rc, stdout, stderr) = measure_time(run_cli, test_repo, "search", "Update")
+        elapsed, (rc, stdout, stderr) = measure_time(run_cli, test_repo, "search", "Update", rounds=5, warmup=1)
         assert rc == 0, f"Search command failed: {stderr}"
-        assert elapsed < 2.0, f"Search took {elapsed:.2f}s, should be < 2s"
-        print(f"       [OK] Search completed in {elapsed:.2f}s")
+        assert elapsed < 2.0, f"Search median {elapsed:.2f}s, should be < 2s"
+        print(f"       [OK] Search median {elapsed:.3f}s over 5 runs")
 
         print("\n[SUCCESS] List performance test passed!")
 
 
 def test_revert_performance():
     """Test that revert performs well with large repository."""
-    with tempfile.TemporaryDirectory() as tmp_dir:
+    with tempfile.TemporaryDirectory(dir=fast_tmp()) as tmp_dir:
         test_repo = Path(tmp_dir) / "test-revert-perf"
-        test_repo.mkdir()
 
         print("\n[1/4] Test revert performance...")
 
         # Setup
         print("[2/4] Setting up...")
-        create_large_repo(test_repo, num_files=100)
-        create_many_checkpoints(test_repo, num_checkpoints=20)
+        clone_repo(base_repo(100, 20), test_repo)
 
         # Test revert performance
         print("[3/4] TEST: Revert performance...")
@@ -224,15 +277,13 @@ def test_revert_performance():
 
 def test_undo_performance():
     """Test that undo performs well."""
-    with tempfile.TemporaryDirectory() as tmp_dir:
+    with tempfile.TemporaryDirectory(dir=fast_tmp()) as tmp_dir:
         test_repo = Path(tmp_dir) / "test-undo-perf"
-        test_repo.mkdir()
 
         print("\n[1/3] Test undo performance...")
 
         # Setup
-        create_large_repo(test_repo, num_files=100)
-        create_many_checkpoints(test_repo, num_checkpoints=20)
+        clone_repo(base_repo(100, 20), test_repo)
 
         # Test undo performance
         print("[2/3] TEST: Undo performance...")
@@ -254,15 +305,13 @@ def test_undo_performance():
 
 def test_export_performance():
     """Test that export performs well with large diffs."""
-    with tempfile.TemporaryDirectory() as tmp_dir:
+    with tempfile.TemporaryDirectory(dir=fast_tmp()) as tmp_dir:
         test_repo = Path(tmp_dir) / "test-export-perf"
-        test_repo.mkdir()
 
         print("\n[1/3] Test export performance...")
 
         # Setup
-        create_large_repo(test_repo, num_files=100)
-        create_many_checkpoints(test_repo, num_checkpoints=10)
+        clone_repo(base_repo(100, 10), test_repo)
 
         # Test export performance
         print("[2/3] TEST: Export performance...")
@@ -287,15 +336,13 @@ def test_export_performance():
 
 def test_many_consecutive_operations():
     """Test performance of many consecutive operations."""
-    with tempfile.TemporaryDirectory() as tmp_dir:
+    with tempfile.TemporaryDirectory(dir=fast_tmp()) as tmp_dir:
         test_repo = Path(tmp_dir) / "test-ops-perf"
-        test_repo.mkdir()
 
         print("\n[1/3] Test consecutive operations...")
 
         # Setup
-        create_large_repo(test_repo, num_files=50)
-        create_many_checkpoints(test_repo, num_checkpoints=10)
+        clone_repo(base_repo(50, 10), test_repo)
 
         # Run multiple operations in sequence
         print("[2/3] TEST: Multiple consecutive operations...")
@@ -328,50 +375,60 @@ def test_many_consecutive_operations():
 
 def test_timeline_file_size():
     """Test that timeline file size remains reasonable."""
-    with tempfile.TemporaryDirectory() as tmp_dir:
+    with tempfile.TemporaryDirectory(dir=fast_tmp()) as tmp_dir:
         test_repo = Path(tmp_dir) / "test-size"
-        test_repo.mkdir()
 
         print("\n[1/3] Test timeline file size...")
 
         # Setup
-        create_large_repo(test_repo, num_files=100)
-        create_many_checkpoints(test_repo, num_checkpoints=50)
+        clone_repo(base_repo(100, 50), test_repo)
 
         # Check timeline file size
         print("[2/3] TEST: Timeline file size...")
         timeline_file = test_repo / ".claude" / "data" / "timeline.jsonl"
         assert timeline_file.exists(), "Timeline file should exist"
-
-        file_size = timeline_file.stat().st_size
+        file_size = os.stat(timeline_file).st_size
         # 50 entries with full prompts should be manageable
         # Each entry is roughly 500-1000 bytes, so 50 entries = 25-50KB
         assert file_size < 200000, f"Timeline file is {file_size} bytes, should be < 200KB"
         print(f"       [OK] Timeline file: {file_size} bytes ({file_size / 1024:.1f} KB)")
 
-        # Verify list still performs well
+        # Verify list still performs well (through the already-running session)
         print("[3/3] TEST: Performance with large timeline...")
-        elapsed, (rc, stdout, stderr) = measure_time(run_cli, test_repo, "list")
+        elapsed, (rc, stdout, stderr) = measure_time(run_cli, test_repo, "list", rounds=5, warmup=1)
         assert rc == 0, f"List failed: {stderr}"
-        assert elapsed < 2.0, f"List took {elapsed:.2f}s with large timeline"
+        assert elapsed < 2.0, f"List median {elapsed:.2f}s with large timeline"
         print(f"       [OK] List performs well with {file_size / 1024:.1f} KB timeline")
 
         print("\n[SUCCESS] Timeline file size test passed!")
 
 
+TESTS = [
+    test_list_performance_with_many_entries,
+    test_revert_performance,
+    test_undo_performance,
+    test_export_performance,
+    test_many_consecutive_operations,
+    test_timeline_file_size,
+]
+
+
 def main():
-    """Run all performance tests."""
+    """Run all performance tests (in parallel unless --serial is given)."""
     print("\n" + "=" * 60)
     print("Phase 8.5: Large Repository Performance Tests")
     print("=" * 60)
     print("\nNote: These tests may take a minute to run...")
 
-    test_list_performance_with_many_entries()
-    test_revert_performance()
-    test_undo_performance()
-    test_export_performance()
-    test_many_consecutive_operations()
-    test_timeline_file_size()
+    # Build the shared base repos up front, smallest first, so larger ones
+    # extend smaller ones; forked workers reuse the finished cache, spawned
+    # ones rebuild it (see helpers.run_tests)
+    for num_files, num_checkpoints in [(50, 10), (100, 10), (100, 20), (100, 30), (100, 50)]:
+        base_repo(num_files, num_checkpoints)
+    close_sessions()
+
+    # The tests share no state, so they can run side by side
+    run_tests(TESTS)
 
     print("\n" + "=" * 60)
     print("[SUCCESS] All Phase 8.5 performance tests passed!")
@@ -1,187 +1,168 @@
 #!/usr/bin/env python3
-"""Unit tests for restore commands with replay functionality."""
+"""Unit tests for restore commands with replay functionality.
 
-import subprocess
+When run directly, the tests execute in parallel worker processes;
+pass --serial to run them one after another.
+"""
+
+import re
 import sys
-import tempfile
 from pathlib import Path
+from typing import NamedTuple, Optional
 
 # Add lib to path
 LIB_DIR = Path(__file__).parent.parent / "lib"
 sys.path.insert(0, str(LIB_DIR))
 
+from helpers import GitBatch, copy_repo, run_cli, run_cli_batch, fresh_dir, run_tests, template_repo
 
-def run_git(cwd: Path, *args):
-    """Run git command."""
-    result = subprocess.run(
-        ["git"] + list(args),
-        cwd=cwd,
-        capture_output=True,
-        text=True
-    )
-    return result.returncode, result.stdout, result.stderr
-
-
-def run_cli(cwd: Path, *args):
-    """Run rewindo CLI command."""
-    project_root = Path(__file__).parent.parent
-    env = {**subprocess.os.environ, 'PYTHONPATH': str(project_root / 'lib')}
-    result = subprocess.run(
-        [sys.executable, str(project_root / "bin" / "rewindo"), "--cwd", str(cwd)] + list(args),
-        cwd=cwd,
-        capture_output=True,
-        text=True,
-        env=env
-    )
-    return result.returncode, result.stdout, result.stderr
+
+class Turn(NamedTuple):
+    """
+    One prompt cycle in a test scenario.
+
+    user_edit (if any) is written to file.txt uncommitted before
+    capture-prompt, which records it as a user step; the assistant then
+    commits content and capture-stop records the assistant step.
+
+    The assistant commit holds file.txt only. .claude/ stays untracked,
+    so revert's `reset --hard` can't roll the timeline back with it.
+    """
+    prompt: str
+    content: bytes
+    user_edit: Optional[bytes] = None
+
+
+_SCENARIOS = {}
+
+
+def _scenario_dir() -> Path:
+    """Return a path (not yet created) for a new scenario repo."""
+    return fresh_dir("scenario-") / "repo"
+
+
+def build_scenario(initial: bytes, turns: tuple) -> Path:
+    """
+    Return a repo that has played the given turns, built once per scenario.
+
+    A new scenario starts from the longest cached prefix of its turns and
+    commits all remaining turns through one fast-import stream, keeping a
+    copy of each intermediate prefix so later scenarios sharing it reuse
+    the work. Tests copy the result before mutating it.
+
+    Commits go through GitBatch rather than the `git add -A` these tests
+    once ran, so they never pick up .claude/data. The tests only check
+    file.txt and the timeline, which are the same either way.
+    """
+    if not turns:
+        return template_repo((("file.txt", initial),))[0]
+    if (initial, turns) in _SCENARIOS:
+        return _SCENARIOS[initial, turns]
+
+    start = max(n for n in range(len(turns)) if n == 0 or (initial, turns[:n]) in _SCENARIOS)
+    repo = _scenario_dir()
+    copy_repo(build_scenario(initial, turns[:start]), repo)
+
+    with GitBatch(repo) as git:
+        for n in range(start, len(turns)):
+            if n > start:
+                prefix = _scenario_dir()
+                copy_repo(repo, prefix)
+                _SCENARIOS[initial, turns[:n]] = prefix
+
+            turn = turns[n]
+            if turn.user_edit is not None:
+                (repo / "file.txt").write_bytes(turn.user_edit)
+            run_cli(repo, "capture-prompt", "--prompt", turn.prompt, capture=False)
+            git.commit_file("file.txt", turn.content, turn.prompt)
+            run_cli(repo, "capture-stop", capture=False)
+
+    _SCENARIOS[initial, turns] = repo
+    return repo
+
+
+# Actor column of one list row: "#<id> <A|U> <date/time ...>"
+ACTOR_RE = re.compile(r"^#\d+\s+([AU])\s", re.MULTILINE)
+
+V1 = b"v1\n"
+THREE_LINES = b"line1\nline2\nline3\n"
+
+# Step #1: Assistant creates v2
+UPDATE_TO_V2 = Turn("Update to v2", b"v2\n")
+# Step #2: User makes manual edit to v2.1; step #3: Assistant creates v3
+USER_V2_1_THEN_V3 = Turn("Next step", b"v3\n", user_edit=b"v2.1\n")
+# Step #4: User makes manual edit to v3.1; step #5: Assistant creates v4
+USER_V3_1_THEN_V4 = Turn("Final step", b"v4\n", user_edit=b"v3.1\n")
 
 
 def get_file_content(cwd: Path, path: str) -> str:
-    """Get file content."""
-    file_path = cwd / path
-    if file_path.exists():
-        return file_path.read_text()
-    return ""
+    """Get file content ("" if the file does not exist)."""
+    # Read unconditionally: a cache keyed on mtime could serve stale content,
+    # since timestamps only advance per clock tick and revert rewrites files
+    # within milliseconds of the previous read.
+    try:
+        return (cwd / path).read_text()
+    except FileNotFoundError:
+        return ""
 
 
 def test_restore_to_step():
     """Test basic restore to a step."""
-    with tempfile.TemporaryDirectory() as tmp_dir:
-        test_repo = Path(tmp_dir) / "test-repo"
-        test_repo.mkdir()
-
-        # Initialize git repo
-        run_git(test_repo, "init")
-        run_git(test_repo, "config", "user.email", "test@test.com")
-        run_git(test_repo, "config", "user.name", "Test")
-        (test_repo / "file.txt").write_text("v1\n")
-        run_git(test_repo, "add", "-A")
-        run_git(test_repo, "commit", "-m", "v1")
+    test_repo = fresh_dir() / "test-repo"
 
-        # Create checkpoint #1 (assistant creates v2)
-        run_cli(test_repo, "capture-prompt", "--prompt", "Add feature")
-        (test_repo / "file.txt").write_text("v2\n")
-        run_git(test_repo, "add", "-A")
-        run_git(test_repo, "commit", "-m", "v2")
-        run_cli(test_repo, "capture-stop")
+    # Checkpoint #1 (assistant creates v2), checkpoint #2 (assistant creates v3)
+    turns = (Turn("Add feature", b"v2\n"), Turn("Add another", b"v3\n"))
+    copy_repo(build_scenario(V1, turns), test_repo)
 
-        # Create checkpoint #2 (assistant creates v3)
-        run_cli(test_repo, "capture-prompt", "--prompt", "Add another")
-        (test_repo / "file.txt").write_text("v3\n")
-        run_git(test_repo, "add", "-A")
-        run_git(test_repo, "commit", "-m", "v3")
-        run_cli(test_repo, "capture-stop")
+    # Verify file is v3
+    assert get_file_content(test_repo, "file.txt") == "v3\n"
 
-        # Verify file is v3
-        assert get_file_content(test_repo, "file.txt") == "v3\n"
+    # Restore to #1 (should be v2, since #1 captured the state after first assistant response)
+    run_cli(test_repo, "revert", "1", "--yes", capture=False)
 
-        # Restore to #1 (should be v2, since #1 captured the state after first assistant response)
-        run_cli(test_repo, "revert", "1", "--yes")
+    # File should be v2 (what assistant created in step #1)
+    assert get_file_content(test_repo, "file.txt") == "v2\n"
 
-        # File should be v2 (what assistant created in step #1)
-        assert get_file_content(test_repo, "file.txt") == "v2\n"
-
-        print("[OK] Basic restore works")
+    print("[OK] Basic restore works")
 
 
 def test_restore_with_replay_user():
     """Test restore with replay of user edits."""
-    with tempfile.TemporaryDirectory() as tmp_dir:
-        test_repo = Path(tmp_dir) / "test-repo"
-        test_repo.mkdir()
+    test_repo = fresh_dir() / "test-repo"
+    copy_repo(build_scenario(V1, (UPDATE_TO_V2, USER_V2_1_THEN_V3)), test_repo)
 
-        # Initialize git repo
-        run_git(test_repo, "init")
-        run_git(test_repo, "config", "user.email", "test@test.com")
-        run_git(test_repo, "config", "user.name", "Test")
-        (test_repo / "file.txt").write_text("v1\n")
-        run_git(test_repo, "add", "-A")
-        run_git(test_repo, "commit", "-m", "v1")
+    # Current: v3
+    assert get_file_content(test_repo, "file.txt") == "v3\n"
 
-        # Step #1: Assistant creates v2
-        run_cli(test_repo, "capture-prompt", "--prompt", "Update to v2")
-        (test_repo / "file.txt").write_text("v2\n")
-        run_git(test_repo, "add", "-A")
-        run_git(test_repo, "commit", "-m", "v2")
-        run_cli(test_repo, "capture-stop")
+    # Restore to #1 with replay user
+    # #1 has v2, then we cherry-pick the user edit (v2.1)
+    run_cli(test_repo, "revert", "1", "--replay", "user", "--yes", capture=False)
 
-        # Step #2: User makes manual edit to v2.1
-        (test_repo / "file.txt").write_text("v2.1\n")
-        run_cli(test_repo, "capture-prompt", "--prompt", "Next step")
+    # Should be v2.1 (v2 from step #1 + user edit cherry-picked)
+    content = get_file_content(test_repo, "file.txt")
+    assert content == "v2.1\n", f"Expected 'v2.1\\n', got '{repr(content)}'"
 
-        # Step #3: Assistant creates v3
-        (test_repo / "file.txt").write_text("v3\n")
-        run_git(test_repo, "add", "-A")
-        run_git(test_repo, "commit", "-m", "v3")
-        run_cli(test_repo, "capture-stop")
+    print("[OK] Restore with replay user works")
 
-        # Current: v3
-        assert get_file_content(test_repo, "file.txt") == "v3\n"
 
-        # Restore to #1 with replay user
-        # #1 has v2, then we cherry-pick the user edit (v2.1)
-        run_cli(test_repo, "revert", "1", "--replay", "user", "--yes")
+def test_restore_replay_to_specific_step():
+    """Test restore with --to option to limit replay."""
+    test_repo = fresh_dir() / "test-repo"
+    turns = (UPDATE_TO_V2, USER_V2_1_THEN_V3, USER_V3_1_THEN_V4)
+    copy_repo(build_scenario(V1, turns), test_repo)
 
-        # Should be v2.1 (v2 from step #1 + user edit cherry-picked)
-        content = get_file_content(test_repo, "file.txt")
-        assert content == "v2.1\n", f"Expected 'v2.1\\n', got '{repr(content)}'"
+    # Current: v4
+    assert get_file_content(test_repo, "file.txt") == "v4\n"
 
-        print("[OK] Restore with replay user works")
+    # Restore to #1 with replay user --to 3
+    # This should replay user step #2 but NOT user step #4
+    run_cli(test_repo, "revert", "1", "--replay", "user", "--to", "3", "--yes", capture=False)
 
+    # Should be v2.1 (v2 from step #1 + user edit from #2, NOT #4)
+    content = get_file_content(test_repo, "file.txt")
+    assert content == "v2.1\n", f"Expected 'v2.1\\n', got '{repr(content)}'"
 
-def test_restore_replay_to_specific_step():
-    """Test restore with --to option to limit replay."""
-    with tempfile.TemporaryDirectory() as tmp_dir:
-        test_repo = Path(tmp_dir) / "test-repo"
-        test_repo.mkdir()
-
-        # Initialize git repo
-        run_git(test_repo, "init")
-        run_git(test_repo, "config", "user.email", "test@test.com")
-        run_git(test_repo, "config", "user.name", "Test")
-        (test_repo / "file.txt").write_text("v1\n")
-        run_git(test_repo, "add", "-A")
-        run_git(test_repo, "commit", "-m", "v1")
-
-        # Step #1: Assistant creates v2
-        run_cli(test_repo, "capture-prompt", "--prompt", "Update to v2")
-        (test_repo / "file.txt").write_text("v2\n")
-        run_git(test_repo, "add", "-A")
-        run_git(test_repo, "commit", "-m", "v2")
-        run_cli(test_repo, "capture-stop")
-
-        # Step #2: User makes manual edit to v2.1
-        (test_repo / "file.txt").write_text("v2.1\n")
-        run_cli(test_repo, "capture-prompt", "--prompt", "Next step")
-
-        # Step #3: Assistant creates v3
-        (test_repo / "file.txt").write_text("v3\n")
-        run_git(test_repo, "add", "-A")
-        run_git(test_repo, "commit", "-m", "v3")
-        run_cli(test_repo, "capture-stop")
-
-        # Step #4: User makes manual edit to v3.1
-        (test_repo / "file.txt").write_text("v3.1\n")
-        run_cli(test_repo, "capture-prompt", "--prompt", "Final step")
-
-        # Step #5: Assistant creates v4
-        (test_repo / "file.txt").write_text("v4\n")
-        run_git(test_repo, "add", "-A")
-        run_git(test_repo, "commit", "-m", "v4")
-        run_cli(test_repo, "capture-stop")
-
-        # Current: v4
-        assert get_file_content(test_repo, "file.txt") == "v4\n"
-
-        # Restore to #1 with replay user --to 3
-        # This should replay user step #2 but NOT user step #4
-        run_cli(test_repo, "revert", "1", "--replay", "user", "--to", "3", "--yes")
-
-        # Should be v2.1 (v2 from step #1 + user edit from #2, NOT #4)
-        content = get_file_content(test_repo, "file.txt")
-        assert content == "v2.1\n", f"Expected 'v2.1\\n', got '{repr(content)}'"
-
-        print("[OK] Restore with --to option works")
+    print("[OK] Restore with --to option works")
 
 
 def test_restore_conflict_handling():
@@ -191,146 +172,100 @@ def test_restore_conflict_handling():
     code that was already changed in an intermediate assistant step, creating
     a conflict when replayed.
     """
-    with tempfile.TemporaryDirectory() as tmp_dir:
-        test_repo = Path(tmp_dir) / "test-repo"
-        test_repo.mkdir()
-
-        # Initialize git repo
-        run_git(test_repo, "init")
-        run_git(test_repo, "config", "user.email", "test@test.com")
-        run_git(test_repo, "config", "user.name", "Test")
-        (test_repo / "file.txt").write_text("line1\nline2\nline3\n")
-        run_git(test_repo, "add", "-A")
-        run_git(test_repo, "commit", "-m", "Initial")
-
+    test_repo = fresh_dir() / "test-repo"
+    turns = (
         # Step #1: Assistant modifies line2
-        run_cli(test_repo, "capture-prompt", "--prompt", "Modify line2")
-        (test_repo / "file.txt").write_text("line1\nassistant line2\nline3\n")
-        run_git(test_repo, "add", "-A")
-        run_git(test_repo, "commit", "-m", "Assistant")
-        run_cli(test_repo, "capture-stop")
-
+        Turn("Modify line2", b"line1\nassistant line2\nline3\n"),
         # Step #2: User modifies line2 (creating a divergent change)
-        (test_repo / "file.txt").write_text("line1\nuser line2\nline3\n")
-        run_cli(test_repo, "capture-prompt", "--prompt", "User edit")
-
         # Step #3: Assistant ALSO modifies line2 differently
-        (test_repo / "file.txt").write_text("line1\ndifferent assistant line2\nline3\n")
-        run_git(test_repo, "add", "-A")
-        run_git(test_repo, "commit", "-m", "Assistant2")
-        run_cli(test_repo, "capture-stop")
-
+        Turn("User edit", b"line1\ndifferent assistant line2\nline3\n",
+             user_edit=b"line1\nuser line2\nline3\n"),
         # Step #4: User creates another snapshot that will conflict
         # This user step's parent is step #3, which has "different assistant line2"
-        (test_repo / "file.txt").write_text("line1\nuser step4 line2\nline3\n")
-        run_cli(test_repo, "capture-prompt", "--prompt", "Another user edit")
-
         # Step #5: Assistant commits more changes
-        (test_repo / "file.txt").write_text("line1\ndifferent assistant line2\nmore content\n")
-        run_git(test_repo, "add", "-A")
-        run_git(test_repo, "commit", "-m", "Assistant3")
-        run_cli(test_repo, "capture-stop")
+        Turn("Another user edit", b"line1\ndifferent assistant line2\nmore content\n",
+             user_edit=b"line1\nuser step4 line2\nline3\n"),
+    )
+    copy_repo(build_scenario(THREE_LINES, turns), test_repo)
 
-        # Now restore to #1 and replay user steps #2 and #4
-        # Step #2 will apply cleanly (parent is #1)
-        # Step #4's parent is #3, but after replaying #2, we don't have #3's state
-        # So cherry-picking #4 should conflict because the base doesn't match
-        rc, stdout, stderr = run_cli(test_repo, "revert", "1", "--replay", "user", "--yes")
+    # Now restore to #1 and replay user steps #2 and #4
+    # Step #2 will apply cleanly (parent is #1)
+    # Step #4's parent is #3, but after replaying #2, we don't have #3's state
+    # So cherry-picking #4 should conflict because the base doesn't match
+    rc, stdout, stderr = run_cli(test_repo, "revert", "1", "--replay", "user", "--yes")
 
-        # Should return error code 1 for conflict
-        assert rc == 1, f"Expected error code 1 for conflict, got {rc}"
-        assert "Conflict" in stderr or "conflict" in stderr or "error:" in stderr.lower(), f"Expected conflict message, got: {stderr}"
+    # Should return error code 1 for conflict
+    assert rc == 1, f"Expected error code 1 for conflict, got {rc}"
+    message = stderr.lower()
+    assert "conflict" in message or "error:" in message, f"Expected conflict message, got: {stderr}"
 
-        print("[OK] Conflict handling works")
+    print("[OK] Conflict handling works")
 
 
 def test_restore_no_user_edits():
     """Test restore with --replay user when there are no user edits."""
-    with tempfile.TemporaryDirectory() as tmp_dir:
-        test_repo = Path(tmp_dir) / "test-repo"
-        test_repo.mkdir()
-
-        # Initialize git repo
-        run_git(test_repo, "init")
-        run_git(test_repo, "config", "user.email", "test@test.com")
-        run_git(test_repo, "config", "user.name", "Test")
-        (test_repo / "file.txt").write_text("v1\n")
-        run_git(test_repo, "add", "-A")
-        run_git(test_repo, "commit", "-m", "v1")
-
-        # Step #1: Assistant creates v2
-        run_cli(test_repo, "capture-prompt", "--prompt", "Update to v2")
-        (test_repo / "file.txt").write_text("v2\n")
-        run_git(test_repo, "add", "-A")
-        run_git(test_repo, "commit", "-m", "v2")
-        run_cli(test_repo, "capture-stop")
+    test_repo = fresh_dir() / "test-repo"
 
-        # Step #2: Assistant creates v3 (no user edits in between)
-        run_cli(test_repo, "capture-prompt", "--prompt", "Update to v3")
-        (test_repo / "file.txt").write_text("v3\n")
-        run_git(test_repo, "add", "-A")
-        run_git(test_repo, "commit", "-m", "v3")
-        run_cli(test_repo, "capture-stop")
+    # Step #2: Assistant creates v3 (no user edits in between)
+    turns = (UPDATE_TO_V2, Turn("Update to v3", b"v3\n"))
+    copy_repo(build_scenario(V1, turns), test_repo)
 
-        # Current: v3
-        assert get_file_content(test_repo, "file.txt") == "v3\n"
+    # Current: v3
+    assert get_file_content(test_repo, "file.txt") == "v3\n"
 
-        # Restore to #1 with replay user (but no user edits between #1 and #3)
-        run_cli(test_repo, "revert", "1", "--replay", "user", "--yes")
+    # Restore to #1 with replay user (but no user edits between #1 and #3)
+    run_cli(test_repo, "revert", "1", "--replay", "user", "--yes", capture=False)
 
-        # Should be v2 (step #1 captured v2, no user edits to replay)
-        assert get_file_content(test_repo, "file.txt") == "v2\n"
+    # Should be v2 (step #1 captured v2, no user edits to replay)
+    assert get_file_content(test_repo, "file.txt") == "v2\n"
 
-        print("[OK] Restore with no user edits works")
+    print("[OK] Restore with no user edits works")
 
 
 def test_list_shows_actor_for_restore():
     """Test that list shows actor to help decide what to restore."""
-    with tempfile.TemporaryDirectory() as tmp_dir:
-        test_repo = Path(tmp_dir) / "test-repo"
-        test_repo.mkdir()
+    test_repo = fresh_dir() / "test-repo"
+    copy_repo(build_scenario(V1, (Turn("Add auth", b"v2\n"),)), test_repo)
 
-        # Initialize git repo
-        run_git(test_repo, "init")
-        run_git(test_repo, "config", "user.email", "test@test.com")
-        run_git(test_repo, "config", "user.name", "Test")
-        (test_repo / "file.txt").write_text("v1\n")
-        run_git(test_repo, "add", "-A")
-        run_git(test_repo, "commit", "-m", "v1")
+    # Create mixed timeline, then list: it should show the actor column
+    (test_repo / "file.txt").write_text("v2-user\n")
+    _, (rc, stdout, stderr) = run_cli_batch(test_repo, [
+        ("capture-prompt", "--prompt", "Add db"),
+        ("list",),
+    ])
 
-        # Create mixed timeline
-        run_cli(test_repo, "capture-prompt", "--prompt", "Add auth")
-        (test_repo / "file.txt").write_text("v2\n")
-        run_git(test_repo, "add", "-A")
-        run_git(test_repo, "commit", "-m", "v2")
-        run_cli(test_repo, "capture-stop")
+    # Check for actor indicators in the actor column itself, not anywhere
+    # in the output (the header alone contains capital letters)
+    actors = set(ACTOR_RE.findall(stdout))
+    assert "A" in actors, f"Should show assistant actor, got: {stdout}"
+    assert "U" in actors, f"Should show user actor, got: {stdout}"
 
-        (test_repo / "file.txt").write_text("v2-user\n")
-        run_cli(test_repo, "capture-prompt", "--prompt", "Add db")
+    print("[OK] List shows actor for restore planning")
 
-        # List should show actor column
-        rc, stdout, stderr = run_cli(test_repo, "list")
-        output = stdout
 
-        # Check for actor indicators
-        assert "A" in output, "Should show assistant actor"
-        assert "U" in output, "Should show user actor"
-
-        print("[OK] List shows actor for restore planning")
+TESTS = [
+    test_restore_to_step,
+    test_restore_with_replay_user,
+    test_restore_replay_to_specific_step,
+    test_restore_conflict_handling,
+    test_restore_no_user_edits,
+    test_list_shows_actor_for_restore,
+]
 
 
 def main():
-    """Run all tests."""
+    """Run all tests (in parallel unless --serial is given)."""
     print("=" * 60)
     print("Restore Commands Unit Tests")
     print("=" * 60)
 
-    test_restore_to_step()
-    test_restore_with_replay_user()
-    test_restore_replay_to_specific_step()
-    test_restore_conflict_handling()
-    test_restore_no_user_edits()
-    test_list_shows_actor_for_restore()
+    # Build both template repos up front; forked workers reuse them, spawned
+    # ones rebuild them (see helpers.run_tests)
+    build_scenario(V1, ())
+    build_scenario(THREE_LINES, ())
+
+    # Each test works in its own repo copy
+    run_tests(TESTS)
 
     print("=" * 60)
     print("[SUCCESS] All restore command tests passed!")
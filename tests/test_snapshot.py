@@ -1,372 +1,257 @@
 #!/usr/bin/env python3
 """Unit tests for SnapshotCreator."""
 
-import subprocess
-import sys
-import tempfile
+import os
 from pathlib import Path
+from typing import Dict
 
-# Add lib to path
-LIB_DIR = Path(__file__).parent.parent / "lib"
-sys.path.insert(0, str(LIB_DIR))
+import pytest
 
+# helpers puts lib/ on sys.path
+from helpers import GitBatch, fresh_repo, git_output, run_git_quiet
 from snapshot import SnapshotCreator
 from detector import FileChange
 
+# Every test here builds repos and runs git; skip them with -m "not slow"
+pytestmark = pytest.mark.slow
 
-def run_git(cwd: Path, *args):
-    """Run git command."""
-    result = subprocess.run(
-        ["git"] + list(args),
-        cwd=cwd,
-        capture_output=True,
-        text=True
-    )
-    return result.returncode, result.stdout, result.stderr
+
+def write_files(repo: Path, files: Dict[str, bytes]):
+    """Write each file's bytes into repo with a bare open/write/close."""
+    flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+    for name, content in files.items():
+        fd = os.open(os.path.join(repo, name), flags, 0o644)
+        try:
+            os.write(fd, content)
+        finally:
+            os.close(fd)
 
 
 def test_create_snapshot_with_changes():
     """Test creating a snapshot with file changes."""
-    with tempfile.TemporaryDirectory() as tmp_dir:
-        test_repo = Path(tmp_dir) / "test-repo"
-        test_repo.mkdir()
-
-        # Initialize git repo
-        run_git(test_repo, "init")
-        run_git(test_repo, "config", "user.email", "test@test.com")
-        run_git(test_repo, "config", "user.name", "Test")
-
-        # Create initial commit
-        (test_repo / "file1.txt").write_text("hello\n")
-        run_git(test_repo, "add", "-A")
-        run_git(test_repo, "commit", "-m", "Initial")
-        _, parent_sha, _ = run_git(test_repo, "rev-parse", "HEAD")
-        parent_sha = parent_sha.strip()
-
-        # Make changes
-        (test_repo / "file1.txt").write_text("hello world\n")
-        (test_repo / "file2.txt").write_text("new\n")
-
-        # Create snapshot
-        creator = SnapshotCreator(test_repo)
-        result = creator.create_snapshot(
-            parent_sha=parent_sha,
-            message="Test snapshot",
-            actor="user"
-        )
-
-        assert result is not None, "Snapshot should be created"
-        assert result.sha is not None, "Snapshot should have a SHA"
-        assert len(result.sha) == 40, "SHA should be 40 characters"
-        assert len(result.files) == 2, f"Expected 2 files, got {len(result.files)}"
-        assert result.message == "Test snapshot"
-
-        # Verify the commit exists
-        _, cat_output, _ = run_git(test_repo, "cat-file", "-t", result.sha)
-        assert "commit" in cat_output, "Snapshot should be a valid commit"
-
-        print(f"[OK] Created snapshot {result.sha[:8]} with {len(result.files)} files")
+    # Repo with an initial commit
+    test_repo, parent_sha = fresh_repo({"file1.txt": b"hello\n"})
+
+    # Make changes
+    write_files(test_repo, {"file1.txt": b"hello world\n", "file2.txt": b"new\n"})
+
+    # Create snapshot
+    creator = SnapshotCreator(test_repo)
+    result = creator.create_snapshot(
+        parent_sha=parent_sha,
+        message="Test snapshot",
+        actor="user"
+    )
+
+    assert result is not None, "Snapshot should be created"
+    assert result.sha is not None, "Snapshot should have a SHA"
+    assert len(result.sha) == 40, "SHA should be 40 characters"
+    assert len(result.files) == 2, f"Expected 2 files, got {len(result.files)}"
+    assert result.message == "Test snapshot"
+
+    # Verify the commit exists
+    cat_output = git_output(test_repo, "cat-file", "-t", result.sha)
+    assert "commit" in cat_output, "Snapshot should be a valid commit"
+
+    print(f"[OK] Created snapshot {result.sha[:8]} with {len(result.files)} files")
 
 
 def test_create_snapshot_no_changes():
     """Test creating a snapshot with no changes returns None."""
-    with tempfile.TemporaryDirectory() as tmp_dir:
-        test_repo = Path(tmp_dir) / "test-repo"
-        test_repo.mkdir()
-
-        # Initialize git repo
-        run_git(test_repo, "init")
-        run_git(test_repo, "config", "user.email", "test@test.com")
-        run_git(test_repo, "config", "user.name", "Test")
-
-        # Create initial commit
-        (test_repo / "file1.txt").write_text("hello\n")
-        run_git(test_repo, "add", "-A")
-        run_git(test_repo, "commit", "-m", "Initial")
-        _, parent_sha, _ = run_git(test_repo, "rev-parse", "HEAD")
-        parent_sha = parent_sha.strip()
-
-        # No changes made
-
-        # Create snapshot should return None
-        creator = SnapshotCreator(test_repo)
-        result = creator.create_snapshot(
-            parent_sha=parent_sha,
-            message="Test snapshot",
-            actor="user"
-        )
-
-        assert result is None, "Snapshot should be None when no changes"
-
-        print("[OK] Snapshot returns None when no changes")
-
-
-def test_store_and_get_ref():
-    """Test storing and retrieving step refs."""
-    with tempfile.TemporaryDirectory() as tmp_dir:
-        test_repo = Path(tmp_dir) / "test-repo"
-        test_repo.mkdir()
-
-        # Initialize git repo
-        run_git(test_repo, "init")
-        run_git(test_repo, "config", "user.email", "test@test.com")
-        run_git(test_repo, "config", "user.name", "Test")
-
-        # Create initial commit
-        (test_repo / "file.txt").write_text("hello\n")
-        run_git(test_repo, "add", "-A")
-        run_git(test_repo, "commit", "-m", "Initial")
-        _, sha, _ = run_git(test_repo, "rev-parse", "HEAD")
-        sha = sha.strip()
-
-        # Store ref
-        creator = SnapshotCreator(test_repo)
-        result = creator.store_ref(1, sha)
-        assert result, "store_ref should succeed"
-
-        # Get ref
-        retrieved_sha = creator.get_ref_sha(1)
-        assert retrieved_sha == sha, f"Expected {sha}, got {retrieved_sha}"
-
-        print("[OK] Store and get ref works")
-
-
-def test_list_step_refs():
-    """Test listing step refs."""
-    with tempfile.TemporaryDirectory() as tmp_dir:
-        test_repo = Path(tmp_dir) / "test-repo"
-        test_repo.mkdir()
-
-        # Initialize git repo
-        run_git(test_repo, "init")
-        run_git(test_repo, "config", "user.email", "test@test.com")
-        run_git(test_repo, "config", "user.name", "Test")
-
-        # Create commits
-        shas = []
-        for i in range(3):
-            (test_repo / f"file{i}.txt").write_text(f"content {i}\n")
-            run_git(test_repo, "add", "-A")
-            run_git(test_repo, "commit", "-m", f"Commit {i}")
-            _, sha, _ = run_git(test_repo, "rev-parse", "HEAD")
-            shas.append(sha.strip())
-
-        # Store refs
-        creator = SnapshotCreator(test_repo)
-        for i, sha in enumerate(shas):
-            creator.store_ref(i + 1, sha)
-
-        # List refs
-        refs = creator.list_step_refs()
-        assert len(refs) == 3, f"Expected 3 refs, got {len(refs)}"
-        assert refs[0]["id"] == 1
-        assert refs[1]["id"] == 2
-        assert refs[2]["id"] == 3
-
-        print("[OK] List step refs works")
-
-
-def test_delete_ref():
-    """Test deleting a step ref."""
-    with tempfile.TemporaryDirectory() as tmp_dir:
-        test_repo = Path(tmp_dir) / "test-repo"
-        test_repo.mkdir()
-
-        # Initialize git repo
-        run_git(test_repo, "init")
-        run_git(test_repo, "config", "user.email", "test@test.com")
-        run_git(test_repo, "config", "user.name", "Test")
-
-        # Create initial commit
-        (test_repo / "file.txt").write_text("hello\n")
-        run_git(test_repo, "add", "-A")
-        run_git(test_repo, "commit", "-m", "Initial")
-        _, sha, _ = run_git(test_repo, "rev-parse", "HEAD")
-        sha = sha.strip()
+    # Repo with an initial commit
+    test_repo, parent_sha = fresh_repo({"file1.txt": b"hello\n"})
 
-        # Store ref
-        creator = SnapshotCreator(test_repo)
-        creator.store_ref(1, sha)
+    # No changes made
 
-        # Verify it exists
-        assert creator.get_ref_sha(1) == sha
+    # Create snapshot should return None
+    creator = SnapshotCreator(test_repo)
+    result = creator.create_snapshot(
+        parent_sha=parent_sha,
+        message="Test snapshot",
+        actor="user"
+    )
 
-        # Delete ref
-        result = creator.delete_ref(1)
-        assert result, "delete_ref should succeed"
+    assert result is None, "Snapshot should be None when no changes"
 
-        # Verify it's gone
-        assert creator.get_ref_sha(1) is None, "Ref should be deleted"
+    print("[OK] Snapshot returns None when no changes")
 
-        print("[OK] Delete ref works")
 
+def test_ref_operations():
+    """Test storing, retrieving, listing and deleting step refs in one repo."""
+    # Repo with only an empty initial commit
+    test_repo, _ = fresh_repo({})
 
-def test_snapshot_with_deleted_files():
-    """Test creating a snapshot that includes deleted files."""
-    with tempfile.TemporaryDirectory() as tmp_dir:
-        test_repo = Path(tmp_dir) / "test-repo"
-        test_repo.mkdir()
-
-        # Initialize git repo
-        run_git(test_repo, "init")
-        run_git(test_repo, "config", "user.email", "test@test.com")
-        run_git(test_repo, "config", "user.name", "Test")
+    # Create commits, all through one fast-import
+    with GitBatch(test_repo, sync_index=False) as git:
+        shas = [git.commit_file(f"file{i}.txt", b"content %d\n" % i, f"Commit {i}") for i in range(3)]
 
-        # Create initial commit with two files
-        (test_repo / "file1.txt").write_text("hello\n")
-        (test_repo / "file2.txt").write_text("world\n")
-        run_git(test_repo, "add", "-A")
-        run_git(test_repo, "commit", "-m", "Initial")
-        _, parent_sha, _ = run_git(test_repo, "rev-parse", "HEAD")
-        parent_sha = parent_sha.strip()
+    creator = SnapshotCreator(test_repo)
 
-        # Delete file2
-        (test_repo / "file2.txt").unlink()
+    # Store and get ref
+    result = creator.store_ref(1, shas[0])
+    assert result, "store_ref should succeed"
+    retrieved_sha = creator.get_ref_sha(1)
+    assert retrieved_sha == shas[0], f"Expected {shas[0]}, got {retrieved_sha}"
 
-        # Create snapshot
-        creator = SnapshotCreator(test_repo)
-        result = creator.create_snapshot(
-            parent_sha=parent_sha,
-            message="Deleted file2",
-            actor="user"
-        )
+    # List refs
+    for i, sha in enumerate(shas[1:], start=2):
+        creator.store_ref(i, sha)
+    refs = creator.list_step_refs()
+    assert len(refs) == 3, f"Expected 3 refs, got {len(refs)}"
+    assert [r["id"] for r in refs] == [1, 2, 3]
+    assert [r["sha"] for r in refs] == shas
 
-        assert result is not None, "Snapshot should be created"
+    # Delete ref
+    result = creator.delete_ref(1)
+    assert result, "delete_ref should succeed"
+    assert creator.get_ref_sha(1) is None, "Ref should be deleted"
+    assert [r["id"] for r in creator.list_step_refs()] == [2, 3]
 
-        # Verify the commit reflects the deletion
-        _, ls_output, _ = run_git(test_repo, "ls-tree", "-r", "--name-only", result.sha)
-        files = ls_output.strip().split('\n')
+    print("[OK] Store, get, list and delete refs work")
 
-        assert "file1.txt" in files, "file1 should exist in snapshot"
-        assert "file2.txt" not in files, "file2 should be deleted in snapshot"
 
-        print("[OK] Snapshot correctly handles deleted files")
+def test_snapshot_with_deleted_files():
+    """Test creating a snapshot that includes deleted files."""
+    # Repo with two files committed
+    test_repo, parent_sha = fresh_repo({"file1.txt": b"hello\n", "file2.txt": b"world\n"})
+
+    # Delete file2
+    (test_repo / "file2.txt").unlink()
+
+    # Create snapshot
+    creator = SnapshotCreator(test_repo)
+    result = creator.create_snapshot(
+        parent_sha=parent_sha,
+        message="Deleted file2",
+        actor="user"
+    )
 
+    assert result is not None, "Snapshot should be created"
 
-def test_snapshot_with_untracked_files():
-    """Test creating a snapshot that includes untracked files."""
-    with tempfile.TemporaryDirectory() as tmp_dir:
-        test_repo = Path(tmp_dir) / "test-repo"
-        test_repo.mkdir()
+    # Verify the commit reflects the deletion
+    ls_output = git_output(test_repo, "ls-tree", "-r", "--name-only", result.sha)
+    files = set(ls_output.splitlines())
 
-        # Initialize git repo
-        run_git(test_repo, "init")
-        run_git(test_repo, "config", "user.email", "test@test.com")
-        run_git(test_repo, "config", "user.name", "Test")
+    assert "file1.txt" in files, "file1 should exist in snapshot"
+    assert "file2.txt" not in files, "file2 should be deleted in snapshot"
 
-        # Create initial commit
-        (test_repo / "file1.txt").write_text("hello\n")
-        run_git(test_repo, "add", "-A")
-        run_git(test_repo, "commit", "-m", "Initial")
-        _, parent_sha, _ = run_git(test_repo, "rev-parse", "HEAD")
-        parent_sha = parent_sha.strip()
+    print("[OK] Snapshot correctly handles deleted files")
 
-        # Add untracked file
-        (test_repo / "file2.txt").write_text("new\n")
 
-        # Create snapshot
-        creator = SnapshotCreator(test_repo)
-        result = creator.create_snapshot(
-            parent_sha=parent_sha,
-            message="Added file2",
-            actor="user"
-        )
+def test_snapshot_with_untracked_files():
+    """Test creating a snapshot that includes untracked files."""
+    # Repo with an initial commit
+    test_repo, parent_sha = fresh_repo({"file1.txt": b"hello\n"})
+
+    # Add untracked file
+    write_files(test_repo, {"file2.txt": b"new\n"})
+
+    # Create snapshot
+    creator = SnapshotCreator(test_repo)
+    result = creator.create_snapshot(
+        parent_sha=parent_sha,
+        message="Added file2",
+        actor="user"
+    )
 
-        assert result is not None, "Snapshot should be created"
+    assert result is not None, "Snapshot should be created"
 
-        # Verify the commit includes the untracked file
-        _, ls_output, _ = run_git(test_repo, "ls-tree", "-r", "--name-only", result.sha)
-        files = ls_output.strip().split('\n')
+    # Verify the commit includes the untracked file
+    ls_output = git_output(test_repo, "ls-tree", "-r", "--name-only", result.sha)
+    files = set(ls_output.splitlines())
 
-        assert "file1.txt" in files, "file1 should exist in snapshot"
-        assert "file2.txt" in files, "file2 (untracked) should be in snapshot"
+    assert "file1.txt" in files, "file1 should exist in snapshot"
+    assert "file2.txt" in files, "file2 (untracked) should be in snapshot"
 
-        print("[OK] Snapshot correctly includes untracked files")
+    print("[OK] Snapshot correctly includes untracked files")
 
 
 def test_snapshot_preserves_user_index():
     """Test that snapshot creation doesn't affect user's staged index."""
-    with tempfile.TemporaryDirectory() as tmp_dir:
-        test_repo = Path(tmp_dir) / "test-repo"
-        test_repo.mkdir()
-
-        # Initialize git repo
-        run_git(test_repo, "init")
-        run_git(test_repo, "config", "user.email", "test@test.com")
-        run_git(test_repo, "config", "user.name", "Test")
-
-        # Create initial commit
-        (test_repo / "file1.txt").write_text("hello\n")
-        run_git(test_repo, "add", "-A")
-        run_git(test_repo, "commit", "-m", "Initial")
-        _, parent_sha, _ = run_git(test_repo, "rev-parse", "HEAD")
-        parent_sha = parent_sha.strip()
-
-        # Stage a file (user's index)
-        (test_repo / "staged.txt").write_text("staged\n")
-        run_git(test_repo, "add", "staged.txt")
-
-        # Verify file is staged
-        _, status, _ = run_git(test_repo, "diff", "--cached", "--name-only")
-        assert "staged.txt" in status, "File should be staged"
-
-        # Create snapshot with different changes
-        (test_repo / "unstaged.txt").write_text("unstaged\n")
-        creator = SnapshotCreator(test_repo)
-        result = creator.create_snapshot(
-            parent_sha=parent_sha,
-            message="Snapshot",
-            actor="user"
-        )
+    # Repo with an initial commit
+    test_repo, parent_sha = fresh_repo({"file1.txt": b"hello\n"})
+
+    # Stage a file (user's index)
+    write_files(test_repo, {"staged.txt": b"staged\n"})
+    run_git_quiet(test_repo, "add", "staged.txt")
+
+    # Verify file is staged
+    status = git_output(test_repo, "diff", "--cached", "--name-only")
+    assert "staged.txt" in status, "File should be staged"
+
+    # Create snapshot with different changes
+    write_files(test_repo, {"unstaged.txt": b"unstaged\n"})
+    creator = SnapshotCreator(test_repo)
+    result = creator.create_snapshot(
+        parent_sha=parent_sha,
+        message="Snapshot",
+        actor="user"
+    )
 
-        assert result is not None, "Snapshot should be created"
+    assert result is not None, "Snapshot should be created"
 
-        # Verify user's staged file is still staged
-        _, status, _ = run_git(test_repo, "diff", "--cached", "--name-only")
-        assert "staged.txt" in status, "File should still be staged after snapshot"
+    # Verify user's staged file is still staged
+    status = git_output(test_repo, "diff", "--cached", "--name-only")
+    assert "staged.txt" in status, "File should still be staged after snapshot"
 
-        print("[OK] Snapshot preserves user's index")
+    print("[OK] Snapshot preserves user's index")
 
 
 def test_numstat_in_snapshot_result():
     """Test that numstat is included in snapshot result."""
-    with tempfile.TemporaryDirectory() as tmp_dir:
-        test_repo = Path(tmp_dir) / "test-repo"
-        test_repo.mkdir()
-
-        # Initialize git repo
-        run_git(test_repo, "init")
-        run_git(test_repo, "config", "user.email", "test@test.com")
-        run_git(test_repo, "config", "user.name", "Test")
-
-        # Create initial commit
-        (test_repo / "file.txt").write_text("hello\nworld\n")
-        run_git(test_repo, "add", "-A")
-        run_git(test_repo, "commit", "-m", "Initial")
-        _, parent_sha, _ = run_git(test_repo, "rev-parse", "HEAD")
-        parent_sha = parent_sha.strip()
-
-        # Modify file (1 deletion, 1 addition)
-        (test_repo / "file.txt").write_text("hello\nfoo\n")
+    # Repo with an initial commit
+    test_repo, parent_sha = fresh_repo({"file.txt": b"hello\nworld\n"})
+
+    # Modify file (1 deletion, 1 addition)
+    write_files(test_repo, {"file.txt": b"hello\nfoo\n"})
+
+    # Create snapshot
+    creator = SnapshotCreator(test_repo)
+    result = creator.create_snapshot(
+        parent_sha=parent_sha,
+        message="Modified file",
+        actor="user"
+    )
 
-        # Create snapshot
-        creator = SnapshotCreator(test_repo)
-        result = creator.create_snapshot(
-            parent_sha=parent_sha,
-            message="Modified file",
-            actor="user"
-        )
+    assert result is not None, "Snapshot should be created"
+    assert len(result.files) == 1, "Should have 1 file"
+
+    file_info = result.files[0]
+    assert file_info["path"] == "file.txt"
+    assert file_info["status"] == "M"
+    assert "additions" in file_info, "Should have additions"
+    assert "deletions" in file_info, "Should have deletions"
+
+    print(f"[OK] Numstat included: +{file_info['additions']}/-{file_info['deletions']}")
+
+
+def test_snapshot_stages_paths_in_batches():
+    """Test that changes spanning several PATHS_PER_CALL batches are all staged."""
+    # Five committed files: modify two, delete three, add five new ones
+    test_repo, parent_sha = fresh_repo({f"old{i}.txt": b"old\n" for i in range(5)})
+    write_files(test_repo, {"old0.txt": b"changed\n", "old1.txt": b"changed\n"})
+    for i in range(2, 5):
+        (test_repo / f"old{i}.txt").unlink()
+    write_files(test_repo, {f"new{i}.txt": b"new\n" for i in range(5)})
+
+    creator = SnapshotCreator(test_repo)
+    creator.PATHS_PER_CALL = 2
+    result = creator.create_snapshot(
+        parent_sha=parent_sha,
+        message="Many changes",
+        actor="user"
+    )
 
-        assert result is not None, "Snapshot should be created"
-        assert len(result.files) == 1, "Should have 1 file"
+    assert result is not None, "Snapshot should be created"
+    ls_output = git_output(test_repo, "ls-tree", "-r", "--name-only", result.sha)
+    expected = {"old0.txt", "old1.txt"} | {f"new{i}.txt" for i in range(5)}
+    assert set(ls_output.splitlines()) == expected
 
-        file_info = result.files[0]
-        assert file_info["path"] == "file.txt"
-        assert file_info["status"] == "M"
-        assert "additions" in file_info, "Should have additions"
-        assert "deletions" in file_info, "Should have deletions"
+    stats = {f["path"]: f for f in result.files}
+    assert stats["old0.txt"]["additions"] == 1
+    assert stats["old1.txt"]["deletions"] == 1
 
-        print(f"[OK] Numstat included: +{file_info['additions']}/-{file_info['deletions']}")
+    print("[OK] Snapshot stages paths in batches")
 
 
 def main():
@@ -377,13 +262,12 @@ def main():
 
     test_create_snapshot_with_changes()
     test_create_snapshot_no_changes()
-    test_store_and_get_ref()
-    test_list_step_refs()
-    test_delete_ref()
+    test_ref_operations()
     test_snapshot_with_deleted_files()
     test_snapshot_with_untracked_files()
     test_snapshot_preserves_user_index()
     test_numstat_in_snapshot_result()
+    test_snapshot_stages_paths_in_batches()
 
     print("=" * 60)
     print("[SUCCESS] All SnapshotCreator tests passed!")
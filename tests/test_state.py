@@ -2,173 +2,232 @@
 """Unit tests for StateManager."""
 
 import json
-import tempfile
-from pathlib import Path
+import os
+import stat
 import sys
+from pathlib import Path
 
-# Add lib to path
-LIB_DIR = Path(__file__).parent.parent / "lib"
-sys.path.insert(0, str(LIB_DIR))
+import pytest
 
+# helpers puts lib/ on sys.path
+from helpers import fresh_dir
 from state import StateManager
 
+# Pure Python, no git
+pytestmark = pytest.mark.fast
 
-def test_state_manager_creates_file():
-    """Test that StateManager creates state file."""
-    with tempfile.TemporaryDirectory() as tmp_dir:
-        data_dir = Path(tmp_dir) / "data"
-        manager = StateManager(data_dir)
 
-        # Initially, state should be empty
-        state = manager.load_state()
-        assert state["last_step_sha"] is None
-        assert state["last_step_id"] is None
-        assert state["updated_at"] is None
+def fresh_data_dir() -> Path:
+    """Return a path for a new data directory (not yet created)."""
+    return fresh_dir() / "data"
 
-        # State file should exist after load (even if empty)
-        # Actually, it shouldn't exist until we save
-        assert not manager.state_file.exists()
 
-        print("[OK] StateManager creates empty state")
+def test_empty_state_invariants():
+    """Test that a new StateManager reports empty state and writes nothing."""
+    data_dir = fresh_data_dir()
+    manager = StateManager(data_dir)
 
+    # Initially, state should be empty
+    state = manager.load_state()
+    assert state["last_step_sha"] is None
+    assert state["last_step_id"] is None
+    assert state["updated_at"] is None
 
-def test_state_manager_saves_and_loads():
-    """Test saving and loading state."""
-    with tempfile.TemporaryDirectory() as tmp_dir:
-        data_dir = Path(tmp_dir) / "data"
-        manager = StateManager(data_dir)
+    # Getters agree with the loaded state
+    assert manager.get_last_step_sha() is None
+    assert manager.get_last_step_id() is None
 
-        # Save state (timestamp will be auto-added)
-        result = manager.save_state({
-            "last_step_sha": "abc123",
-            "last_step_id": 5
-        })
-        assert result
-        assert manager.state_file.exists()
+    # Reading doesn't create the state file; only saving does
+    assert not manager.state_file.exists()
 
-        # Load state
-        state = manager.load_state()
-        assert state["last_step_sha"] == "abc123"
-        assert state["last_step_id"] == 5
-        assert state["updated_at"] is not None
-        assert "T" in state["updated_at"]  # ISO format
+    print("[OK] StateManager starts with empty state")
 
-        print("[OK] StateManager saves and loads state")
 
+def test_state_manager_saves_and_loads():
+    """Test saving and loading state."""
+    data_dir = fresh_data_dir()
+    manager = StateManager(data_dir)
 
-def test_update_last_step():
-    """Test update_last_step method."""
-    with tempfile.TemporaryDirectory() as tmp_dir:
-        data_dir = Path(tmp_dir) / "data"
-        manager = StateManager(data_dir)
+    # Save state (timestamp will be auto-added)
+    result = manager.save_state({
+        "last_step_sha": "abc123",
+        "last_step_id": 5
+    })
+    assert result
+    assert manager.state_file.exists()
 
-        # Update last step
-        result = manager.update_last_step("def456", 10)
-        assert result
+    # Load state
+    state = manager.load_state()
+    assert state["last_step_sha"] == "abc123"
+    assert state["last_step_id"] == 5
+    assert state["updated_at"] is not None
+    assert "T" in state["updated_at"]  # ISO format
 
-        # Verify
-        assert manager.get_last_step_sha() == "def456"
-        assert manager.get_last_step_id() == 10
+    print("[OK] StateManager saves and loads state")
 
-        # Load and verify
-        state = manager.load_state()
-        assert state["last_step_sha"] == "def456"
-        assert state["last_step_id"] == 10
-        assert state["updated_at"] is not None  # Should have timestamp
 
-        print("[OK] update_last_step works correctly")
+def test_update_last_step():
+    """Test update_last_step method."""
+    data_dir = fresh_data_dir()
+    manager = StateManager(data_dir)
 
+    # Update last step
+    result = manager.update_last_step("def456", 10)
+    assert result
 
-def test_getters_return_none_for_empty_state():
-    """Test that getters return None for empty state."""
-    with tempfile.TemporaryDirectory() as tmp_dir:
-        data_dir = Path(tmp_dir) / "data"
-        manager = StateManager(data_dir)
+    # Verify
+    assert manager.get_last_step_sha() == "def456"
+    assert manager.get_last_step_id() == 10
 
-        assert manager.get_last_step_sha() is None
-        assert manager.get_last_step_id() is None
+    # Load and verify
+    state = manager.load_state()
+    assert state["last_step_sha"] == "def456"
+    assert state["last_step_id"] == 10
+    assert state["updated_at"] is not None  # Should have timestamp
 
-        print("[OK] Getters return None for empty state")
+    print("[OK] update_last_step works correctly")
 
 
 def test_clear_state():
     """Test clearing state."""
-    with tempfile.TemporaryDirectory() as tmp_dir:
-        data_dir = Path(tmp_dir) / "data"
-        manager = StateManager(data_dir)
+    data_dir = fresh_data_dir()
+    manager = StateManager(data_dir)
 
-        # Add some state
-        manager.update_last_step("abc123", 5)
-        assert manager.state_file.exists()
+    # Add some state
+    manager.update_last_step("abc123", 5)
+    assert manager.state_file.exists()
 
-        # Clear
-        result = manager.clear()
-        assert result
-        assert not manager.state_file.exists()
+    # Clear
+    result = manager.clear()
+    assert result
+    assert not manager.state_file.exists()
 
-        # Verify empty state
-        assert manager.get_last_step_sha() is None
-        assert manager.get_last_step_id() is None
+    # Verify empty state
+    assert manager.get_last_step_sha() is None
+    assert manager.get_last_step_id() is None
 
-        print("[OK] Clear works correctly")
+    print("[OK] Clear works correctly")
 
 
 def test_invalid_json_returns_empty_state():
     """Test that invalid JSON returns empty state (graceful degradation)."""
-    with tempfile.TemporaryDirectory() as tmp_dir:
-        data_dir = Path(tmp_dir) / "data"
-        manager = StateManager(data_dir)
+    data_dir = fresh_data_dir()
+    manager = StateManager(data_dir)
 
-        # Write invalid JSON
-        manager.state_file.write_text("{invalid json")
+    # Write invalid JSON
+    manager.state_file.write_text("{invalid json")
 
-        # Load should return empty state, not crash
-        state = manager.load_state()
-        assert state["last_step_sha"] is None
-        assert state["last_step_id"] is None
-        assert state["updated_at"] is None
+    # Load should return empty state, not crash
+    state = manager.load_state()
+    assert state["last_step_sha"] is None
+    assert state["last_step_id"] is None
+    assert state["updated_at"] is None
 
-        print("[OK] Invalid JSON handled gracefully")
+    print("[OK] Invalid JSON handled gracefully")
 
 
 def test_atomic_write():
     """Test that writes are atomic (uses temp file)."""
-    with tempfile.TemporaryDirectory() as tmp_dir:
-        data_dir = Path(tmp_dir) / "data"
-        manager = StateManager(data_dir)
+    data_dir = fresh_data_dir()
+    manager = StateManager(data_dir)
+
+    # Save state
+    manager.update_last_step("abc123", 5)
+
+    # Verify temp file was cleaned up
+    temp_file = manager.state_file.with_suffix(".tmp")
+    assert not temp_file.exists()
+
+    # Verify main file exists and is valid
+    assert manager.state_file.exists()
+    with open(manager.state_file) as f:
+        data = json.load(f)
+        assert data["last_step_sha"] == "abc123"
 
-        # Save state
-        manager.update_last_step("abc123", 5)
+    print("[OK] Atomic write works (temp file cleaned up)")
 
-        # Verify temp file was cleaned up
-        temp_file = manager.state_file.with_suffix(".tmp")
-        assert not temp_file.exists()
 
-        # Verify main file exists and is valid
-        assert manager.state_file.exists()
-        with open(manager.state_file) as f:
-            data = json.load(f)
-            assert data["last_step_sha"] == "abc123"
+def test_state_file_mode_follows_umask():
+    """Test that the state file gets the mode the umask allows."""
+    if sys.platform == "win32":
+        print("[SKIP] No POSIX file modes on Windows")
+        return
 
-        print("[OK] Atomic write works (temp file cleaned up)")
+    for umask, expected in ((0o022, 0o644), (0o002, 0o664)):
+        manager = StateManager(fresh_data_dir())
+        old_umask = os.umask(umask)
+        try:
+            manager.update_last_step("abc123", 1)
+        finally:
+            os.umask(old_umask)
+        assert stat.S_IMODE(manager.state_file.stat().st_mode) == expected
+
+    print("[OK] State file mode follows the umask")
 
 
 def test_timestamp_auto_added():
     """Test that timestamp is automatically added."""
-    with tempfile.TemporaryDirectory() as tmp_dir:
-        data_dir = Path(tmp_dir) / "data"
-        manager = StateManager(data_dir)
+    data_dir = fresh_data_dir()
+    manager = StateManager(data_dir)
+
+    # Save without timestamp
+    result = manager.save_state({"last_step_sha": "abc", "last_step_id": 1})
+    assert result
+
+    # Load and check timestamp was added
+    state = manager.load_state()
+    assert state["updated_at"] is not None
+    assert "T" in state["updated_at"]  # ISO format has 'T'
+
+    print("[OK] Timestamp automatically added")
+
+
+def test_load_sees_writes_from_other_manager():
+    """Test that a reader sees each write another manager makes."""
+    data_dir = fresh_data_dir()
+    reader = StateManager(data_dir)
+    writer = StateManager(data_dir)
+
+    writer.update_last_step("abc123", 1)
+    assert reader.get_last_step_id() == 1
+
+    # Read again, then a second write from the other manager
+    assert reader.get_last_step_sha() == "abc123"
+    writer.update_last_step("def456", 2)
+    assert reader.get_last_step_sha() == "def456"
+    assert reader.get_last_step_id() == 2
+
+    # Mutating loaded state doesn't change what the next load returns
+    reader.load_state()["last_step_id"] = 99
+    assert reader.get_last_step_id() == 2
+
+    print("[OK] State follows writes from other managers")
+
+
+def test_load_sees_two_writes_within_one_tick():
+    """Test that a same-size write within one mtime tick is not missed."""
+    data_dir = fresh_data_dir()
+    reader = StateManager(data_dir)
+    writer = StateManager(data_dir)
 
-        # Save without timestamp
-        result = manager.save_state({"last_step_sha": "abc", "last_step_id": 1})
-        assert result
+    # Back to back, same size: only the contents differ
+    writer.update_last_step("a" * 40, 1)
+    assert reader.get_last_step_sha() == "a" * 40
+    writer.update_last_step("b" * 40, 2)
+    assert reader.get_last_step_sha() == "b" * 40
+    assert reader.get_last_step_id() == 2
 
-        # Load and check timestamp was added
-        state = manager.load_state()
-        assert state["updated_at"] is not None
-        assert "T" in state["updated_at"]  # ISO format has 'T'
+    # Worst case: same inode, size and mtime as the version already read
+    state_file = data_dir / "state.json"
+    before = state_file.stat()
+    state_file.write_text(state_file.read_text().replace("b" * 40, "c" * 40))
+    os.utime(state_file, ns=(before.st_atime_ns, before.st_mtime_ns))
+    after = state_file.stat()
+    assert (after.st_ino, after.st_size, after.st_mtime_ns) == \
+        (before.st_ino, before.st_size, before.st_mtime_ns)
+    assert reader.get_last_step_sha() == "c" * 40
 
-        print("[OK] Timestamp automatically added")
+    print("[OK] Writes within one mtime tick are seen")
 
 
 def main():
@@ -177,14 +236,16 @@ def main():
     print("StateManager Unit Tests")
     print("=" * 60)
 
-    test_state_manager_creates_file()
+    test_empty_state_invariants()
     test_state_manager_saves_and_loads()
     test_update_last_step()
-    test_getters_return_none_for_empty_state()
     test_clear_state()
     test_invalid_json_returns_empty_state()
     test_atomic_write()
+    test_state_file_mode_follows_umask()
     test_timestamp_auto_added()
+    test_load_sees_writes_from_other_manager()
+    test_load_sees_two_writes_within_one_tick()
 
     print("=" * 60)
     print("[SUCCESS] All StateManager tests passed!")